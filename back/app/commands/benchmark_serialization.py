@@ -0,0 +1,94 @@
+#!/usr/local/bin/python
+
+"""
+Microbenchmark of the JSON serialization of list pages, in-process, without database.
+Compares the timezone conversion of timestamps read from naive columns (`make_aware`)
+with the one of timestamps read from `timestamptz` columns (`to_local`), per value and
+per item of a page of badges.
+"""
+
+import timeit
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import typer
+from rich.console import Console
+
+from app.core.query_pagination import Page
+from app.schemas.badge import BadgeOut
+from app.schemas.user import BadgeOwner
+from app.utils.cli import CustomTable
+from app.utils.timezone import make_aware, to_local
+
+app = typer.Typer()
+
+
+def _per_call(func: Callable[[], Any], repeat: int, number: int) -> float:
+    """Best duration of a single call, in microseconds."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1_000_000
+
+
+def _make_page(items: int, now: datetime) -> Page[BadgeOut]:
+    owner = BadgeOwner(id="owner", first_name="John", last_name="DOE")
+    badges = [
+        BadgeOut(
+            id=f"badge-{i}",
+            owner=owner,
+            created_at=now,
+            modified_at=now,
+            expire_at=now + timedelta(days=i),
+            expired=False,
+            is_active=True,
+        )
+        for i in range(items)
+    ]
+    return Page[BadgeOut](
+        items=badges,
+        total_items=items,
+        start_index=1,
+        end_index=items,
+        total_pages=1,
+        requested_page=1,
+        requested_page_size=items,
+        current_page=1,
+        current_page_size=items,
+    )
+
+
+@app.command()
+def benchmark_serialization(
+    items: int = typer.Option(50, min=1, help="Number of items per page"),
+    repeat: int = typer.Option(5, min=1, help="Number of measures (the best is kept)"),
+    number: int = typer.Option(200, min=1, help="Number of calls per measure"),
+):
+    """Measure the per-item cost of serializing a page of badges."""
+
+    aware_dt = datetime.now(UTC)
+    naive_dt = aware_dt.replace(tzinfo=None)
+    naive_page = _make_page(items, naive_dt)
+    aware_page = _make_page(items, aware_dt)
+    assert naive_page.model_dump_json() == aware_page.model_dump_json()
+
+    table = CustomTable("Serialization benchmark")
+    table.add_row(
+        "make_aware (naive column)",
+        f"{_per_call(lambda: make_aware(naive_dt), repeat, number * 10):.2f} µs/value",
+    )
+    table.add_row(
+        "to_local (timestamptz column)",
+        f"{_per_call(lambda: to_local(aware_dt), repeat, number * 10):.2f} µs/value",
+    )
+    table.add_row(
+        "page, naive values",
+        f"{_per_call(naive_page.model_dump_json, repeat, number) / items:.2f} µs/item",
+    )
+    table.add_row(
+        "page, aware values",
+        f"{_per_call(aware_page.model_dump_json, repeat, number) / items:.2f} µs/item",
+    )
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,141 @@
+#!/usr/local/bin/python
+
+"""
+Benchmark the startup of the API, as done by each gunicorn worker: every run happens in
+a fresh interpreter, which imports `app.main`, then serves a first request (in-process,
+without the lifespan, so that no Redis server is needed).
+
+Measures are compared to a baseline (a JSON file, written with `--save`), so that
+startup regressions are caught. Use `app.commands.profile_imports` to investigate them.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import typer
+from rich.console import Console
+
+from app.commands.profile_imports import group_by_package, profile_imports
+from app.utils.cli import CustomTable
+
+app = typer.Typer()
+
+# Run in a fresh interpreter. `ru_maxrss` is in kilobytes on Linux, in bytes on macOS.
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+
+TestClient(app.main.app).get({path!r})
+served = time.perf_counter()
+
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (served - imported) * 1000,
+    "rss_mb": max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+}}))
+"""
+
+
+@dataclass
+class StartupMeasure:
+    import_ms: float  # cold import of app.main
+    first_request_ms: float  # from the end of the import to the first response
+    rss_mb: float  # peak resident memory after the first request
+
+    @classmethod
+    def median(cls, measures: "list[StartupMeasure]") -> "StartupMeasure":
+        return cls(
+            **{
+                name: statistics.median(getattr(measure, name) for measure in measures)
+                for name in cls.__dataclass_fields__
+            }
+        )
+
+
+def measure_startup(path: str) -> StartupMeasure:
+    """Start the app in a fresh interpreter, and measure it."""
+
+    process = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT.format(path=path)],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Could not start the app:\n{process.stderr}")
+    # the last line, as the app may print logs while starting
+    return StartupMeasure(**json.loads(process.stdout.splitlines()[-1]))
+
+
+def find_regressions(
+    current: StartupMeasure, baseline: StartupMeasure, tolerance: float
+) -> list[str]:
+    """Names of the measures which are more than `tolerance` (ratio) above the baseline."""
+
+    return [
+        name
+        for name in StartupMeasure.__dataclass_fields__
+        if getattr(current, name) > getattr(baseline, name) * (1 + tolerance)
+    ]
+
+
+@app.command()
+def benchmark_startup(
+    runs: int = typer.Option(5, min=1, help="Number of cold starts (the median is kept)"),
+    path: str = typer.Option("/openapi.json", help="Path of the first request"),
+    baseline: str = typer.Option("startup-baseline.json", help="Baseline JSON file"),
+    save: bool = typer.Option(False, help="Save the measures as the new baseline"),
+    tolerance: float = typer.Option(0.2, min=0, help="Allowed regression (ratio)"),
+    top: int = typer.Option(10, min=0, help="Number of packages in the import summary"),
+):
+    """Measure cold import time, first request time and memory of the API."""
+
+    console = Console()
+    current = StartupMeasure.median([measure_startup(path) for _ in range(runs)])
+    baseline_path = Path(baseline)
+    previous = (
+        StartupMeasure(**json.loads(baseline_path.read_text()))
+        if baseline_path.is_file()
+        else None
+    )
+
+    table = CustomTable(f"Startup benchmark (median of {runs} runs)")
+    for name, unit in [("import_ms", "ms"), ("first_request_ms", "ms"), ("rss_mb", "MB")]:
+        value = getattr(current, name)
+        row = [name, f"{value:.1f} {unit}"]
+        if previous is not None:
+            reference = getattr(previous, name)
+            row += [f"baseline: {reference:.1f} {unit}", f"{value / reference - 1:+.0%}"]
+        table.add_row(*row)
+    console.print(table)
+
+    if top:
+        # -X importtime slows imports down: its durations are only meaningful relatively
+        imports = profile_imports("app.main")
+        total_us = sum(import_time.self_us for import_time in imports)
+        table = CustomTable("Import cost by top-level package")
+        for package, self_us in list(group_by_package(imports).items())[:top]:
+            table.add_row(package, f"{self_us / total_us:.0%}")
+        console.print(table)
+
+    if save:
+        baseline_path.write_text(json.dumps(asdict(current), indent=2) + "\n")
+        console.print(f"Baseline saved to {baseline_path}.", style="green")
+    elif previous is not None:
+        regressions = find_regressions(current, previous, tolerance)
+        if regressions:
+            console.print(f"Startup regression: {', '.join(regressions)}.", style="red")
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
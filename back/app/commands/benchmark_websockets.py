@@ -0,0 +1,209 @@
+#!/usr/local/bin/python
+
+"""
+Benchmark the WebSocket fan-out path (Redis pub/sub -> `redis_subscriber` ->
+`ConnectionManager.broadcast`), in-process, with simulated clients.
+
+By default, the configured Redis server is used (channels are prefixed with 'bench-' to
+avoid any collision). Use `--fake-redis` to run without any server (requires the
+`fakeredis` package, a dev dependency which is not installed in the Docker image).
+"""
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any
+
+import typer
+from fastapi import WebSocketDisconnect
+from loguru import logger
+from redis.asyncio import Redis
+from rich.console import Console
+
+from app.core.config import get_settings
+from app.utils.cli import CustomTable
+from app.websockets import redis_subscriber as redis_subscriber_module
+from app.websockets.connection import handle_websocket_connection
+from app.websockets.redis_subscriber import manager, redis_subscriber
+
+settings = get_settings()
+
+app = typer.Typer()
+
+
+@dataclass
+class BenchmarkResult:
+    clients: int
+    rooms: int
+    published: int
+    expected_deliveries: int
+    latencies: list[float] = field(default_factory=list)
+    elapsed: float = 0
+    memory_per_connection: float = 0
+
+    @property
+    def deliveries(self) -> int:
+        return len(self.latencies)
+
+    def percentile(self, p: int) -> float:
+        """Latency percentile, in milliseconds."""
+        if self.deliveries < 2:
+            return self.latencies[0] * 1000 if self.latencies else 0
+        return statistics.quantiles(self.latencies, n=100)[p - 1] * 1000
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.deliveries / self.elapsed if self.elapsed else 0
+
+
+class BenchmarkClient:
+    """Mimics the subset of `fastapi.WebSocket` used by the connection handler."""
+
+    def __init__(self, sent_at: dict[str, float], latencies: list[float]) -> None:
+        self.sent_at = sent_at
+        self.latencies = latencies
+        self.closed = asyncio.Event()
+
+    async def accept(self) -> None:
+        pass
+
+    async def receive_text(self) -> str:
+        # Simulated clients never talk, they only listen until closed
+        await self.closed.wait()
+        raise WebSocketDisconnect()
+
+    async def send_text(self, message: str) -> None:
+        self.latencies.append(time.perf_counter() - self.sent_at[message])
+
+
+async def _ignore_message(*_: Any) -> None:
+    pass
+
+
+def _make_redis(fake_redis: bool) -> Redis:
+    if not fake_redis:
+        return Redis.from_url(url=settings.REDIS_URI, decode_responses=True)
+    try:
+        from fakeredis.aioredis import FakeRedis  # type: ignore
+    except ImportError as e:
+        raise typer.BadParameter(
+            "`poetry install --with dev` to use --fake-redis (fakeredis)."
+        ) from e
+    return FakeRedis(decode_responses=True)
+
+
+async def run_benchmark(
+    clients: int, rooms: int, rate: int, duration: float, fake_redis: bool = False
+) -> BenchmarkResult:
+    redis = _make_redis(fake_redis)
+    # The fan-out path uses the module-level Redis client: point it to the benchmark one
+    original_redis = redis_subscriber_module.redis
+    redis_subscriber_module.redis = redis
+
+    room_names = [f"bench-{i}" for i in range(rooms)]
+    sent_at: dict[str, float] = {}
+    result = BenchmarkResult(
+        clients=clients, rooms=rooms, published=0, expected_deliveries=0
+    )
+
+    # Connect clients, measuring the memory they use
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    bench_clients = [BenchmarkClient(sent_at, result.latencies) for _ in range(clients)]
+    handlers = [
+        asyncio.create_task(
+            handle_websocket_connection(
+                websocket=client,  # type: ignore
+                room=room_names[i % rooms],
+                on_message=_ignore_message,
+            )
+        )
+        for i, client in enumerate(bench_clients)
+    ]
+    await asyncio.sleep(0)  # let all handlers register their socket
+    result.memory_per_connection = (
+        tracemalloc.get_traced_memory()[0] - memory_before
+    ) / clients
+    tracemalloc.stop()
+
+    subscriber = asyncio.create_task(redis_subscriber())
+    try:
+        while await redis.pubsub_numpat() == 0:  # wait for the subscription
+            await asyncio.sleep(0.01)
+
+        # Publish at a controlled rate, spreading messages over rooms
+        interval = 1 / rate
+        start = time.perf_counter()
+        for n in range(int(rate * duration)):
+            room = room_names[n % rooms]
+            message = str(n)
+            sent_at[message] = time.perf_counter()
+            await redis.publish(f"{settings.REDIS_CHANNEL_PREFIX}{room}", message)
+            result.published += 1
+            result.expected_deliveries += manager.count(room)
+            await asyncio.sleep(max(start + (n + 1) * interval - time.perf_counter(), 0))
+
+        # Wait for pending deliveries (with a safety timeout)
+        deadline = time.perf_counter() + max(duration, 5)
+        while (
+            result.deliveries < result.expected_deliveries
+            and time.perf_counter() < deadline
+        ):
+            await asyncio.sleep(0.01)
+        result.elapsed = time.perf_counter() - start
+
+    finally:
+        subscriber.cancel()
+        for client in bench_clients:
+            client.closed.set()
+        await asyncio.gather(subscriber, *handlers, return_exceptions=True)
+        redis_subscriber_module.redis = original_redis
+        await redis.aclose()
+
+    return result
+
+
+@app.command()
+def benchmark_websockets(
+    clients: int = typer.Option(1000, min=1, help="Number of simulated clients"),
+    rooms: int = typer.Option(10, min=1, help="Number of rooms clients are spread over"),
+    rate: int = typer.Option(100, min=1, help="Published messages per second"),
+    duration: float = typer.Option(5, min=0.1, help="Publishing duration, in seconds"),
+    fake_redis: bool = typer.Option(False, help="Use an in-memory Redis (fakeredis)"),
+    max_p99: float | None = typer.Option(None, help="Fail if p99 latency (ms) is higher"),
+):
+    """Measure latency and throughput of the WebSocket fan-out path."""
+
+    logger.disable("app.websockets")  # per-connection logs would flood the output
+    result = asyncio.run(
+        run_benchmark(
+            clients=clients,
+            rooms=rooms,
+            rate=rate,
+            duration=duration,
+            fake_redis=fake_redis,
+        )
+    )
+
+    table = CustomTable("WebSocket fan-out benchmark")
+    table.add_row("clients / rooms", f"{result.clients} / {result.rooms}")
+    table.add_row("published messages", str(result.published))
+    table.add_row(
+        "deliveries", f"{result.deliveries} (expected {result.expected_deliveries})"
+    )
+    table.add_row("p50 latency", f"{result.percentile(50):.2f} ms")
+    table.add_row("p99 latency", f"{result.percentile(99):.2f} ms")
+    table.add_row("throughput", f"{result.messages_per_second:.0f} messages/s")
+    table.add_row("memory per connection", f"{result.memory_per_connection:.0f} B")
+    Console().print(table)
+
+    if result.deliveries < result.expected_deliveries:
+        raise typer.Exit(code=1)
+    if max_p99 is not None and result.percentile(99) > max_p99:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
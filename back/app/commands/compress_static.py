@@ -0,0 +1,74 @@
+#!/usr/local/bin/python
+
+"""
+Write precompressed variants (`file.gz` and `file.br`) of static files, served by
+`PrecompressedStaticFiles`.
+Meant to be run at build time: it does not need any setting nor service.
+"""
+
+import gzip
+from pathlib import Path
+
+import brotli  # type: ignore
+import typer
+
+app = typer.Typer()
+
+# Already compressed formats (images, fonts, archives...) are not worth it
+COMPRESSIBLE_SUFFIXES = {
+    ".css",
+    ".csv",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".mjs",
+    ".svg",
+    ".txt",
+    ".xml",
+}
+
+
+def compress_file(path: Path) -> list[Path]:
+    """Write the variants of the given file which are smaller than it, and return them."""
+
+    content = path.read_bytes()
+    variants = {
+        ".gz": gzip.compress(content, compresslevel=9, mtime=0),
+        ".br": brotli.compress(content, quality=11),  # type: ignore
+    }
+
+    written: list[Path] = []
+    for suffix, compressed in variants.items():
+        variant_path = path.with_name(path.name + suffix)
+        if len(compressed) < len(content):
+            variant_path.write_bytes(compressed)
+            written.append(variant_path)
+        else:
+            variant_path.unlink(missing_ok=True)  # outdated variant
+    return written
+
+
+@app.command()
+def compress_static(
+    directory: str = typer.Option("public", help="Static files directory"),
+    min_size: int = typer.Option(1000, help="Smaller files are not compressed (bytes)"),
+):
+    """Precompress static files of the given directory."""
+
+    root = Path(directory)
+    if not root.is_dir():
+        raise typer.BadParameter(f"{directory} is not a directory.")
+
+    for path in sorted(root.rglob("*")):
+        if (
+            path.is_file()
+            and path.suffix in COMPRESSIBLE_SUFFIXES
+            and path.stat().st_size >= min_size
+        ):
+            for variant_path in compress_file(path):
+                typer.echo(f"{variant_path} ({variant_path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,95 @@
+#!/usr/local/bin/python
+
+"""
+Import-time profile of the API, i.e. what a gunicorn worker does before serving its first
+request. The module is imported in a fresh interpreter with `python -X importtime`, then
+the slowest modules and top-level packages are reported.
+"""
+
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Literal, NamedTuple
+
+import typer
+from rich.console import Console
+
+from app.utils.cli import CustomTable
+
+app = typer.Typer()
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int  # excluding nested imports
+    cumulative_us: int  # including nested imports
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """Parse `-X importtime` lines, e.g. `import time:  120 |  4500 |   app.main`."""
+
+    imports: list[ImportTime] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():  # header line
+            continue
+        imports.append(ImportTime(module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def profile_imports(module: str) -> list[ImportTime]:
+    """Import the given module in a fresh interpreter, and return the import times."""
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Could not import {module}:\n{process.stderr}")
+    return parse_importtime(process.stderr)
+
+
+def group_by_package(imports: list[ImportTime]) -> dict[str, int]:
+    """Total self time of each top-level package, in microseconds, slowest first."""
+
+    totals: defaultdict[str, int] = defaultdict(int)
+    for import_time in imports:
+        totals[import_time.module.partition(".")[0]] += import_time.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+@app.command()
+def profile(
+    module: str = typer.Option("app.main", help="Module to import"),
+    top: int = typer.Option(20, min=1, help="Number of modules and packages to show"),
+    sort: Literal["self", "cumulative"] = typer.Option(
+        "cumulative", help="Sort modules by self or cumulative time"
+    ),
+):
+    """Report the slowest imports of the given module."""
+
+    imports = profile_imports(module)
+    total_us = sum(import_time.self_us for import_time in imports)
+    console = Console()
+
+    table = CustomTable(f"Import of {module}: {total_us / 1000:.0f} ms")
+    key = "self_us" if sort == "self" else "cumulative_us"
+    for import_time in sorted(imports, key=lambda i: getattr(i, key), reverse=True)[:top]:
+        table.add_row(
+            import_time.module,
+            f"{import_time.self_us / 1000:.1f} ms self",
+            f"{import_time.cumulative_us / 1000:.1f} ms cumulative",
+        )
+    console.print(table)
+
+    table = CustomTable("By top-level package")
+    for package, self_us in list(group_by_package(imports).items())[:top]:
+        table.add_row(package, f"{self_us / 1000:.1f} ms", f"{self_us / total_us:.0%}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    app()
@@ -108,11 +108,26 @@ def seed_db(session: Session) -> None:
     )
     periodic_task = PeriodicTask(**periodic_task_create.model_dump())
 
+    sweep_task = PeriodicTask(
+        **PeriodicTaskIn(
+            name="Deactivate expired badges every minute",
+            task="app.tasks.tasks.sweep_expired_badges",
+            interval=timedelta(minutes=1),
+        ).model_dump()
+    )
+    cleanup_task = PeriodicTask(
+        **PeriodicTaskIn(
+            name="Delete expired task results every hour",
+            task="app.tasks.tasks.cleanup_task_results",
+            interval=timedelta(hours=1),
+        ).model_dump()
+    )
+
     ######################################################################################
     # save fake data
     ######################################################################################
 
-    for item in (db_params, david, periodic_task):
+    for item in (db_params, david, periodic_task, sweep_task, cleanup_task):
         session.add(item)
     session.commit()
 
@@ -3,6 +3,8 @@ import logfire
 from celery import Celery
 from celery.signals import beat_init, worker_init
 
+from app.core import http_cache  # noqa: F401 - invalidates cached responses on commit
+from app.core import task_metrics  # noqa: F401 - connects signal handlers
 from app.core.config import get_settings
 
 settings = get_settings()
@@ -17,6 +17,7 @@ from app.core.database import (
 from app.factories.base import MySQLAlchemyModelFactory
 from app.main import app
 from app.models.base import Base
+from app.utils.testing import MaxQueries, assert_max_queries
 
 settings = get_settings()
 
@@ -70,3 +71,9 @@ def session() -> Generator[Session]:
 def setup_factories(session: Session):  # the passed session is the fixture above!
     """Inject test session into all factories."""
     MySQLAlchemyModelFactory.set_session(session)
+
+
+@pytest.fixture()
+def max_queries() -> MaxQueries:
+    """Usage: `with max_queries(2): client.get(...)`, to catch N+1 queries regressions."""
+    return assert_max_queries
@@ -0,0 +1,338 @@
+# pyright: reportUnknownMemberType=false
+"""
+Metrics of the API, exposed by `/metrics` in the Prometheus text format:
+- request counts and latency histograms, per method, route template and status
+- in-flight requests, database pool usage, WebSocket connections per room
+- Redis subscriber lag and reconnections
+
+Like task metrics (cf. app/core/task_metrics.py), observations are aggregated in memory
+by each worker, and flushed to Redis every API_METRICS_FLUSH_DELAY, so that `/metrics`
+returns the figures of all gunicorn workers, whichever worker answers:
+- counters and histograms are added to a shared hash
+- gauges are written in a hash per worker, forgotten when the worker stops flushing
+
+Requests are recorded by `MetricsMiddleware`, on the event loop thread only: no lock is
+needed, and the metrics of each route are bound once (cf. `bind_routes`).
+"""
+
+import asyncio
+import math
+import os
+import socket
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.pool import QueuePool
+from starlette.routing import BaseRoute, Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.websockets.redis_subscriber import manager, subscriber_stats
+
+settings = get_settings()
+
+# Upper bounds of latency buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+UNMATCHED_ROUTE = "unmatched"  # not the path, to keep a bounded number of series
+WS_GAUGE_PREFIX = "ws:"
+
+
+class RouteMetrics:
+    """Observations of a route (method + template) since the last flush."""
+
+    __slots__ = ("statuses", "buckets", "duration_sum")
+
+    def __init__(self) -> None:
+        self.statuses: defaultdict[int, int] = defaultdict(int)
+        self.buckets = [0] * len(BUCKETS)  # non-cumulative
+        self.duration_sum = 0.0
+
+    def observe(self, status: int, duration: float) -> None:
+        self.statuses[status] += 1
+        self.buckets[bisect_left(BUCKETS, duration)] += 1
+        self.duration_sum += duration
+
+    def pop(self) -> dict[str, float]:
+        """Hash fields to increment, and reset."""
+        fields: dict[str, float] = {str(s): count for s, count in self.statuses.items()}
+        for bound, count in zip(BUCKETS, self.buckets, strict=True):
+            if count:
+                fields[f"le:{bound}"] = count
+        if self.statuses:
+            fields["sum"] = self.duration_sum
+        self.statuses.clear()
+        self.buckets = [0] * len(BUCKETS)
+        self.duration_sum = 0.0
+        return fields
+
+
+class APIMetricsRecorder:
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.in_flight = 0
+        self.flushed_reconnects = 0
+        self.last_flush = time.monotonic()
+        self.flush_task: asyncio.Task[None] | None = None
+
+    @property
+    def worker_id(self) -> str:
+        # (not computed once, as workers may be forked after the import)
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def key(name: str) -> str:
+        return f"{settings.API_METRICS_PREFIX}{name}"
+
+    def bind(self, method: str, route: str) -> RouteMetrics:
+        return self.routes.setdefault((method, route), RouteMetrics())
+
+    def bind_routes(self, routes: Iterable[BaseRoute]) -> None:
+        """Bind the metrics of all routes in advance, to save it on first requests."""
+        for route in routes:
+            if isinstance(route, Route):
+                for method in route.methods or ():
+                    self.bind(method, route.path)
+
+    def observe(self, method: str, route: str, status: int, duration: float) -> None:
+        route_metrics = self.routes.get((method, route)) or self.bind(method, route)
+        route_metrics.observe(status, duration)
+        flush_delay = settings.API_METRICS_FLUSH_DELAY.total_seconds()
+        if time.monotonic() - self.last_flush >= flush_delay and (
+            self.flush_task is None or self.flush_task.done()
+        ):
+            self.flush_task = asyncio.create_task(self.flush())
+
+    def gauges(self) -> dict[str, float]:
+        gauges: dict[str, float] = {
+            "in_flight": self.in_flight,
+            "redis_subscriber_lag": subscriber_stats.lag,
+        }
+        if isinstance(engine.pool, QueuePool):
+            gauges |= {
+                "db_pool_size": engine.pool.size(),
+                "db_pool_checked_out": engine.pool.checkedout(),
+                "db_pool_overflow": max(engine.pool.overflow(), 0),
+            }
+        for room, websockets in manager.rooms.items():
+            gauges[f"{WS_GAUGE_PREFIX}{room}"] = len(websockets)
+        return gauges
+
+    async def flush(self) -> None:
+        """Add pending observations and write the gauges of this worker to Redis."""
+
+        self.last_flush = time.monotonic()
+        pending = {
+            f"{method} {route}": route_metrics.pop()
+            for (method, route), route_metrics in self.routes.items()
+            if route_metrics.statuses
+        }
+        reconnects = subscriber_stats.reconnects - self.flushed_reconnects
+        self.flushed_reconnects = subscriber_stats.reconnects
+        requests_key, workers_key = self.key("requests"), self.key("workers")
+        worker_key = self.key(f"worker:{self.worker_id}")
+        ttl = settings.API_METRICS_WORKER_TTL
+        now = time.time()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for prefix, fields in pending.items():
+                    for field, increment in fields.items():
+                        if field == "sum":
+                            pipe.hincrbyfloat(requests_key, f"{prefix} sum", increment)
+                        else:
+                            pipe.hincrby(
+                                requests_key, f"{prefix} {field}", int(increment)
+                            )
+                if reconnects:
+                    pipe.hincrby(
+                        self.key("counters"), "redis_subscriber_reconnects", reconnects
+                    )
+                pipe.delete(worker_key)
+                pipe.hset(worker_key, mapping=self.gauges())  # type: ignore
+                pipe.expire(worker_key, ttl)
+                pipe.zadd(workers_key, {self.worker_id: now + ttl.total_seconds()})
+                # forget workers that stopped flushing
+                pipe.zremrangebyscore(workers_key, "-inf", now)
+                await pipe.execute()
+        except RedisError as e:
+            # Metrics must never break requests: these observations are lost
+            logger.warning(f"Unable to flush API metrics: {e}")
+
+    async def render(self) -> str:
+        """All metrics, from all workers, in the Prometheus text format."""
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.key("requests"))
+            pipe.hgetall(self.key("counters"))
+            pipe.zrangebyscore(self.key("workers"), time.time(), "+inf")
+            requests, counters, workers = await pipe.execute()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for worker in workers:
+                pipe.hgetall(self.key(f"worker:{worker}"))
+            workers_gauges: list[dict[str, str]] = await pipe.execute()
+
+        # Gauges are summed across workers, except the lag (the worst one)
+        gauges: defaultdict[str, float] = defaultdict(float)
+        for worker_gauges in workers_gauges:
+            for name, value in worker_gauges.items():
+                if name == "redis_subscriber_lag":
+                    gauges[name] = max(gauges[name], float(value))
+                else:
+                    gauges[name] += float(value)
+
+        lines = render_requests(requests)
+        lines += render_metric(
+            "http_requests_in_flight",
+            "gauge",
+            "Requests being processed",
+            [({}, gauges["in_flight"])],
+        )
+        for name, description in [
+            ("db_pool_size", "Connections kept in the database pools"),
+            ("db_pool_checked_out", "Database connections in use"),
+            ("db_pool_overflow", "Database connections opened over the pool size"),
+        ]:
+            lines += render_metric(name, "gauge", description, [({}, gauges[name])])
+        lines += render_metric(
+            "websocket_connections",
+            "gauge",
+            "WebSocket connections, per room",
+            [
+                ({"room": name.removeprefix(WS_GAUGE_PREFIX)}, value)
+                for name, value in sorted(gauges.items())
+                if name.startswith(WS_GAUGE_PREFIX)
+            ],
+        )
+        lines += render_metric(
+            "redis_subscriber_lag_seconds",
+            "gauge",
+            "Time for messages to get through the Redis subscriber (worst worker)",
+            [({}, gauges["redis_subscriber_lag"])],
+        )
+        lines += render_metric(
+            "redis_subscriber_reconnects_total",
+            "counter",
+            "Reconnections of the Redis subscriber",
+            [({}, int(counters.get("redis_subscriber_reconnects", 0)))],
+        )
+        return "\n".join(lines) + "\n"
+
+
+recorder = APIMetricsRecorder(
+    redis=Redis.from_url(url=settings.REDIS_URI, decode_responses=True)
+)
+
+
+##########################################################################################
+# Prometheus text format
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+##########################################################################################
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = {
+        name: value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for name, value in labels.items()
+    }
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped.items()) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def render_metric(
+    name: str,
+    kind: str,
+    description: str,
+    samples: list[tuple[dict[str, str], float]],
+) -> list[str]:
+    return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"] + [
+        f"{name}{format_labels(labels)} {format_value(value)}"
+        for labels, value in samples
+    ]
+
+
+def render_requests(fields: dict[str, str]) -> list[str]:
+    """Request counters and latency histograms, from the fields of the shared hash."""
+
+    counts: list[tuple[dict[str, str], float]] = []
+    buckets: defaultdict[tuple[str, str], dict[float, int]] = defaultdict(dict)
+    sums: dict[tuple[str, str], float] = {}
+    for field, value in sorted(fields.items()):
+        method, route, suffix = field.split(" ")
+        if suffix == "sum":
+            sums[method, route] = float(value)
+        elif suffix.startswith("le:"):
+            buckets[method, route][float(suffix.removeprefix("le:"))] = int(value)
+        else:
+            labels = {"method": method, "route": route, "status": suffix}
+            counts.append((labels, int(value)))
+
+    lines = render_metric(
+        "http_requests_total",
+        "counter",
+        "Requests, per route template and status",
+        counts,
+    )
+    name = "http_request_duration_seconds"
+    lines += [f"# HELP {name} Latency of requests, per route template"]
+    lines += [f"# TYPE {name} histogram"]
+    for (method, route), duration_sum in sums.items():
+        labels = {"method": method, "route": route}
+        cumulative = 0
+        for bound in BUCKETS:
+            cumulative += buckets[method, route].get(bound, 0)
+            bucket_labels = format_labels(labels | {"le": format_value(bound)})
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(duration_sum)}")
+        lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+    return lines
+
+
+##########################################################################################
+# Middleware
+##########################################################################################
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # if no response is sent
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        recorder.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            recorder.in_flight -= 1
+            # (the route is set in the scope by the router, when one matches)
+            route = scope.get("route")
+            recorder.observe(
+                scope["method"],
+                route.path if isinstance(route, Route) else UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start,
+            )
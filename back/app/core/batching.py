@@ -0,0 +1,186 @@
+# pyright: reportUnknownMemberType=false
+"""
+Base class for Celery tasks processing many small jobs in bulk.
+
+Calls to `delay()` do not send a message to the broker: they push an item to a Redis
+list, and the list is flushed by a single task execution once it holds `flush_every`
+items, or `flush_interval` after its first item, whichever comes first. The task
+function receives all items at once, and returns one result per item:
+
+    @celery_app.task(base=BatchTask, flush_every=500)
+    def notify_users(items: list[BatchItem]) -> list[bool]:
+        ...
+
+    result = notify_users.delay(user_id=1)  # BatchItemResult
+    result.get(timeout=10)
+
+Flushes are scheduled sparingly, so that slow workers do not receive a message per item:
+- one immediate flush each time the buffer reaches a multiple of `flush_every` items
+- otherwise, at most one flush pending at a time (a Redis flag, set with NX)
+
+Each execution moves its items from the buffer to a list of its own, deleted once their
+results are stored: if its worker dies meanwhile, the message is delivered again (late
+acknowledgement) and the same items are processed.
+
+NOTE: `apply_async()` is left untouched and triggers a flush (it is what `delay()` uses
+to schedule one). Results must be JSON serializable.
+"""
+
+import json
+import time
+from datetime import timedelta
+from typing import Any
+from uuid import uuid4
+
+from celery import Task  # type: ignore
+from pydantic import Field
+from redis import Redis
+
+from app.core.config import get_settings
+from app.schemas.base import MySchema
+
+settings = get_settings()
+
+
+redis = Redis.from_url(url=settings.REDIS_URI, decode_responses=True)
+
+
+class BatchItem(MySchema):
+    id: str = Field(default_factory=lambda: uuid4().hex)
+    args: list[Any] = Field(default=[])
+    kwargs: dict[str, Any] = Field(default={})
+
+
+class BatchItemError(Exception):
+    """Raised when getting the result of an item whose batch failed."""
+
+
+class BatchItemResult:
+    """Handle to the result of a single buffered item (cf. Celery's AsyncResult)."""
+
+    def __init__(self, id: str, redis: Redis) -> None:
+        self.id = id
+        self.redis = redis
+
+    @property
+    def key(self) -> str:
+        return f"{settings.BATCH_RESULT_PREFIX}{self.id}"
+
+    def ready(self) -> bool:
+        return bool(self.redis.exists(self.key))
+
+    def get(self, timeout: float | None = None, interval: float = 0.1) -> Any:
+        """Wait for the item to be processed, and return its result."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while (raw := self.redis.get(self.key)) is None:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Batch item {self.id} was not processed in time.")
+            time.sleep(interval)
+
+        stored = json.loads(raw)  # type: ignore
+        if "error" in stored:
+            raise BatchItemError(stored["error"])
+        return stored["result"]
+
+
+class BatchTask(Task):  # type: ignore
+    """Celery task base class, buffering `delay()` calls in Redis to run them in bulk."""
+
+    flush_every: int = 100  # max number of items processed by a single execution
+    flush_interval: timedelta = timedelta(milliseconds=500)  # max buffering time
+    redis: Redis = redis
+    # Deliver the message again if the worker dies, so that its items are not lost
+    acks_late = True
+    reject_on_worker_lost = True
+
+    @property
+    def buffer_key(self) -> str:
+        return f"{settings.BATCH_BUFFER_PREFIX}{self.name}"
+
+    @property
+    def pending_key(self) -> str:
+        """Set while a flush scheduled by `schedule_flush` is pending."""
+        return f"{self.buffer_key}:pending"
+
+    def processing_key(self, execution_id: str) -> str:
+        return f"{self.buffer_key}:processing:{execution_id}"
+
+    def delay(self, *args: Any, **kwargs: Any) -> BatchItemResult:
+        """Buffer an item, and schedule a flush if needed."""
+
+        item = BatchItem(args=list(args), kwargs=kwargs)
+        size = self.redis.rpush(self.buffer_key, item.model_dump_json())
+        if size % self.flush_every == 0:
+            self.apply_async()
+        elif size == 1:
+            # first item of a new batch: this flush will run even if the batch stays small
+            self.schedule_flush(countdown=self.flush_interval)
+        return BatchItemResult(item.id, self.redis)
+
+    def schedule_flush(self, countdown: timedelta) -> None:
+        """Schedule a flush, unless one is already pending."""
+
+        if self.redis.set(
+            self.pending_key, 1, nx=True, ex=countdown + settings.BATCH_PENDING_TIMEOUT
+        ):
+            self.apply_async(countdown=countdown.total_seconds())
+
+    def take_items(self, processing_key: str) -> list[str]:
+        """Move items from the buffer to the processing list, atomically."""
+
+        with self.redis.pipeline(transaction=True) as pipe:
+            for _ in range(self.flush_every):
+                pipe.lmove(self.buffer_key, processing_key, "LEFT", "RIGHT")
+            pipe.expire(processing_key, settings.BATCH_RESULT_EXPIRE)
+            *raw_items, _ = pipe.execute()
+        return [raw for raw in raw_items if raw is not None]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> int:
+        """Process buffered items (at most `flush_every`), and return their number."""
+
+        processing_key = self.processing_key(self.request.id or uuid4().hex)
+        # (items are already there if the message is delivered again)
+        raw_items = self.redis.lrange(processing_key, 0, -1)
+        if not raw_items:
+            self.redis.delete(self.pending_key)  # items buffered from now need a flush
+            raw_items = self.take_items(processing_key)
+        if not raw_items:
+            return 0  # already flushed by another execution
+        items = [BatchItem.model_validate_json(raw) for raw in raw_items]  # type: ignore
+
+        # Items buffered in the meantime must not wait for a new first item
+        if remaining := self.redis.llen(self.buffer_key):
+            self.schedule_flush(
+                countdown=timedelta(0)
+                if remaining >= self.flush_every
+                else self.flush_interval
+            )
+
+        try:
+            # (Celery's __call__ handles the request stack, when called directly)
+            results = super().__call__(items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"{self.name} returned {len(results)} results for {len(items)} items."
+                )
+        except Exception as e:
+            self.store_results(processing_key, items, [{"error": repr(e)}] * len(items))
+            raise
+        self.store_results(
+            processing_key, items, [{"result": result} for result in results]
+        )
+        return len(items)
+
+    def store_results(
+        self, processing_key: str, items: list[BatchItem], stored: list[dict[str, Any]]
+    ) -> None:
+        with self.redis.pipeline(transaction=True) as pipe:
+            for item, value in zip(items, stored, strict=True):
+                pipe.set(
+                    BatchItemResult(item.id, self.redis).key,
+                    json.dumps(value),
+                    ex=settings.BATCH_RESULT_EXPIRE,
+                )
+            pipe.delete(processing_key)
+            pipe.execute()
@@ -0,0 +1,132 @@
+"""
+Compression of responses:
+- `CompressionMiddleware` compresses responses bigger than COMPRESSION_MINIMUM_SIZE on the
+  fly, with brotli if the client accepts it, gzip otherwise
+- `PrecompressedStaticFiles` serves the `.br` / `.gz` variants of static files written
+  at build time (cf. app/commands/compress_static.py), with caching headers
+"""
+
+import os
+from mimetypes import guess_type
+from typing import Any
+
+import brotli  # type: ignore
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Content-Encoding -> suffix of precompressed files, by order of preference
+STATIC_ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def accepted_encodings(headers: Headers) -> set[str]:
+    """Encodings accepted by the client (those with `q=0` are excluded)."""
+
+    encodings: set[str] = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        encoding, _, params = part.partition(";")
+        if not encoding.strip():
+            continue
+        quality = params.strip().removeprefix("q=")
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)  # type: ignore
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data: bytes = self.compressor.process(body)
+        # flush() lets streamed chunks be decoded as they arrive
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Starlette's GZipMiddleware, preferring brotli when possible."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        compresslevel: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY,
+    ) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "br" in accepted_encodings(Headers(scope=scope)):
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles serving `file.br` or `file.gz` instead of `file` when it exists and the
+    client accepts it. Each variant has its own (strong) ETag, and conditional requests
+    are handled by StaticFiles as usual.
+    """
+
+    def __init__(self, *args: Any, max_age: int, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    def file_response(
+        self,
+        full_path: os.PathLike[str] | str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers)
+        headers = {
+            "Cache-Control": f"public, max-age={self.max_age}",
+            "Vary": "Accept-Encoding",
+        }
+
+        response = None
+        for encoding, suffix in STATIC_ENCODINGS.items():
+            if encoding not in accepted:
+                continue
+            variant_path = f"{full_path}{suffix}"
+            try:
+                variant_stat = os.stat(variant_path)
+            except FileNotFoundError:
+                continue
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,  # sets the ETag of the variant
+                headers=headers | {"Content-Encoding": encoding},
+                media_type=guess_type(str(full_path))[0] or "text/plain",
+            )
+            break
+        if response is None:
+            response = FileResponse(
+                full_path,
+                status_code=status_code,
+                stat_result=stat_result,
+                headers=headers,
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,7 +1,7 @@
 from datetime import timedelta
 from functools import lru_cache
 from pathlib import Path
-from typing import Annotated, Literal, Self
+from typing import Annotated, Any, Literal, Self
 from urllib.parse import urljoin
 from zoneinfo import ZoneInfo
 
@@ -24,8 +24,10 @@ class Settings(BaseSettings):
     ENVIRONMENT: str
     TIMEZONE: ZoneInfo = ZoneInfo("Europe/Paris")
     PHONE_REGION_CODE: str = "FR"
+    PHONE_FORMAT_CACHE_SIZE: int = 4096  # formatted phone numbers kept in memory
     DEFAULT_ITEMS_PER_PAGE: int = 10
     MAX_ITEMS_PER_PAGE: int = 50
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched at once by export endpoints
     FRONT_DOMAIN: str
     BACK_DOMAIN: str
 
@@ -72,6 +74,7 @@ class Settings(BaseSettings):
     CORS_ALLOW_METHODS: list[str] = ["*"]
     CORS_ALLOW_HEADERS: list[str] = ["*"]
     CORS_ALLOW_CREDENTIALS: bool = True
+    DEBUG_ROUTES_ENABLED: bool = True  # should be False in production (/debug routes)
 
     ######################################################################################
     # Social Auth
@@ -138,6 +141,22 @@ class Settings(BaseSettings):
 
     DATABASE_ALLOW_RESET: bool  # prevent human error in production env
     DATABASE_ECHO: bool
+    # Number of queries and DB time in responses (default: only in local & dev)
+    DATABASE_SERVER_TIMING: bool | None = None
+    DATABASE_LOG_QUERY_STATS: bool = False  # log the number of queries of each request
+    # Same statement with this number of different parameters in a request (cf. N+1)
+    DATABASE_N_PLUS_ONE_THRESHOLD: int = 5
+    # Slow query log (cf. app/core/slow_queries.py)
+    SLOW_QUERY_THRESHOLD: timedelta = timedelta(milliseconds=200)
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.1  # share of slow SELECT explained, from 0 to 1
+    SLOW_QUERY_LOG_SIZE: int = 100  # latest slow queries kept by each worker
+    SLOW_QUERY_EXPLAIN_TIMEOUT: timedelta = timedelta(seconds=5)  # statement_timeout
+
+    @model_validator(mode="after")
+    def default_server_timing(self) -> Self:
+        if self.DATABASE_SERVER_TIMING is None:
+            self.DATABASE_SERVER_TIMING = self.ENVIRONMENT in ("local", "dev")
+        return self
 
     @computed_field
     @property
@@ -219,6 +238,58 @@ class Settings(BaseSettings):
     REDIS_HEARBEAT_PONG: str = "pong"
     REDIS_CHANNEL_PREFIX: str = "room:"
     REDIS_RETRY_DELAY: timedelta = timedelta(seconds=3)
+    # The subscriber lag is measured with a PING, answered after pending messages
+    REDIS_SUBSCRIBER_PING_DELAY: timedelta = timedelta(seconds=5)
+
+    # Cluster-wide WebSocket presence (cf. app/websockets/presence.py)
+    REDIS_PRESENCE_PREFIX: str = "presence:"
+    REDIS_PRESENCE_REQUEST: str = "presence"  # text message asking for room occupancy
+    REDIS_PRESENCE_FLUSH_DELAY: timedelta = timedelta(seconds=1)
+    # Entries of a worker that stopped sending heartbeats are forgotten after this delay
+    REDIS_PRESENCE_TTL: timedelta = timedelta(seconds=30)
+
+    ######################################################################################
+    # HTTP cache (cf. app/core/http_cache.py)
+    ######################################################################################
+
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_PREFIX: str = "http-cache:"
+    # Max life of a cached response, for changes not seen by the session events
+    HTTP_CACHE_TTL: timedelta = timedelta(seconds=30)
+    HTTP_CACHE_LOCAL_SIZE: int = 1000  # responses kept in memory by each worker
+    # Max wait for Redis (commits wait for invalidations)
+    HTTP_CACHE_REDIS_TIMEOUT: timedelta = timedelta(milliseconds=200)
+
+    ######################################################################################
+    # Compression (cf. app/core/compression.py)
+    ######################################################################################
+
+    COMPRESSION_MINIMUM_SIZE: int = 1000  # in bytes: smaller responses are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    # On the fly, speed matters more than size (static files are compressed at build time)
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    STATIC_FILES_MAX_AGE: timedelta = timedelta(days=1)
+
+    ######################################################################################
+    # Profiling (cf. app/core/profiling.py)
+    ######################################################################################
+
+    PROFILING_SAMPLE_RATE: float = 0  # share of requests profiled, from 0 to 1
+    PROFILING_HEADER: str = "X-Profile"  # profiles the request if sent by a superuser
+    PROFILING_INTERVAL: timedelta = timedelta(milliseconds=5)
+    PROFILING_DIR: Path = Path(__file__).resolve().parents[2] / "profiles"
+    PROFILING_MAX_FILES: int = 100  # the oldest files are deleted
+
+    ######################################################################################
+    # Metrics of the API, for Prometheus (cf. app/core/api_metrics.py)
+    ######################################################################################
+
+    API_METRICS_ENABLED: bool = True  # /metrics route, and recording of requests
+    API_METRICS_TOKEN: str | None = None  # if set, required by /metrics as a Bearer token
+    API_METRICS_PREFIX: str = "api-metrics:"
+    API_METRICS_FLUSH_DELAY: timedelta = timedelta(seconds=5)
+    # Gauges of a worker that stopped flushing are forgotten after this delay
+    API_METRICS_WORKER_TTL: timedelta = timedelta(seconds=30)
 
     ######################################################################################
     # Celery
@@ -231,9 +302,16 @@ class Settings(BaseSettings):
     def celery_broker_url(self) -> str:
         return self.REDIS_URI
 
+    # Where task results are stored. Results expire natively in Redis, whereas they
+    # are deleted by the `cleanup_task_results` periodic task in the database.
+    TASK_RESULT_BACKEND: Literal["database", "redis"] = "database"
+    TASK_RESULT_CLEANUP_BATCH_SIZE: int = 1000  # rows deleted per transaction
+
     @computed_field
     @property
     def celery_result_backend(self) -> str:
+        if self.TASK_RESULT_BACKEND == "redis":
+            return self.REDIS_URI
         return str(
             MultiHostUrl.build(
                 scheme="db+postgresql+psycopg",
@@ -248,12 +326,64 @@ class Settings(BaseSettings):
     # https://docs.celeryq.dev/en/stable/userguide/configuration.html#result-extended
     celery_result_extended: bool = True
 
+    # https://docs.celeryq.dev/en/stable/userguide/configuration.html#result-expires
+    celery_result_expires: timedelta = timedelta(days=1)
+
+    # https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-ignore-result
+    celery_task_ignore_result: bool = False
+
+    # Per-task settings, e.g. {"app.tasks.tasks.add": {"ignore_result": true}}
+    # https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-annotations
+    celery_task_annotations: dict[str, dict[str, Any]] = {}
+
     # https://docs.celeryq.dev/en/stable/userguide/configuration.html#broker-connection-retry-on-startup
     celery_broker_connection_retry_on_startup: bool = False  # removes warning
 
+    # Tasks are routed to queues, from the most to the least latency-sensitive:
+    # "interactive" (someone is waiting for it), "default", and "bulk" (heavy or periodic
+    # jobs). Each queue is consumed by its own worker profile (cf. doc/XX_celery.md).
+    # https://docs.celeryq.dev/en/stable/userguide/routing.html
+    celery_task_default_queue: str = "default"
+    celery_task_routes: dict[str, dict[str, Any]] = {
+        "app.tasks.tasks.add": {"queue": "interactive"},
+        "app.tasks.tasks.add_many": {"queue": "bulk"},
+        "app.tasks.tasks.sweep_expired_badges": {"queue": "bulk", "priority": 3},
+        "app.tasks.tasks.cleanup_task_results": {"queue": "bulk", "priority": 9},
+    }
+
+    # Priorities within a queue, from 0 (highest) to 9 (lowest) with Redis
+    # https://docs.celeryq.dev/en/stable/userguide/routing.html#redis-message-priorities
+    celery_task_default_priority: int = 5
+    celery_broker_transport_options: dict[str, Any] = {
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(10)),
+        "sep": ":",
+    }
+
     # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
     celery_beat_scheduler: str = "app.core.scheduling:MyDatabaseScheduler"
 
+    # How often the beat scheduler checks the database for periodic task changes
+    BEAT_REFRESH_DELAY: timedelta = timedelta(seconds=5)
+    # How often the beat scheduler writes the run state of tasks to the database
+    BEAT_SYNC_DELAY: timedelta = timedelta(seconds=30)
+    # Several beat replicas can run: only the holder of this lease dispatches tasks
+    BEAT_LEADER_LEASE: timedelta = timedelta(seconds=30)
+
+    # Batching tasks (cf. app/core/batching.py)
+    BATCH_BUFFER_PREFIX: str = "batch:"
+    BATCH_RESULT_PREFIX: str = "batch-result:"
+    BATCH_RESULT_EXPIRE: timedelta = timedelta(hours=1)
+    # A flush still pending after this delay is considered lost, and scheduled again
+    BATCH_PENDING_TIMEOUT: timedelta = timedelta(minutes=1)
+
+    # Task metrics recorded by workers (cf. app/core/task_metrics.py)
+    TASK_METRICS_PREFIX: str = "task-metrics:"
+    TASK_METRICS_FLUSH_DELAY: timedelta = timedelta(seconds=5)
+
+    # Number of badges deactivated per transaction by the expired badges sweep
+    BADGE_SWEEP_CHUNK_SIZE: int = 500
+
     ######################################################################################
     # MinIO
     ######################################################################################
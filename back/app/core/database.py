@@ -1,13 +1,13 @@
 from collections.abc import Generator
 from typing import Annotated
 
-import logfire
 from fastapi import Depends
 from loguru import logger
 from sqlalchemy import Connection, create_engine, text
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
+from app.core.logging import configure_logfire
 
 settings = get_settings()
 
@@ -20,6 +20,8 @@ settings = get_settings()
 engine = create_engine(
     settings.POSTGRES_URI,
     echo=settings.DATABASE_ECHO,  # prints all the SQL statements the engine executes
+    # `timestamptz` values are read in UTC, and naive values are understood as UTC
+    connect_args={"options": "-c timezone=UTC"},
 )
 
 # Admin engine to manage databases (connects to the "postgres" default database)
@@ -35,7 +37,9 @@ admin_engine = create_engine(
 ##########################################################################################
 
 if settings.USE_LOGFIRE:
-    logfire.configure(token=settings.LOGFIRE_TOKEN)
+    import logfire
+
+    configure_logfire()
     logfire.instrument_sqlalchemy(engine=engine)
 
 ##########################################################################################
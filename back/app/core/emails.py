@@ -1,6 +1,5 @@
 from typing import Any
 
-import emails  # type: ignore
 from jinja2 import Template
 from loguru import logger
 
@@ -45,6 +44,8 @@ def _send_email(
         )
 
     elif settings.EMAIL_BACKEND == "smtp":
+        import emails  # type: ignore  # slow to import, so only when actually used
+
         message = emails.Message(
             subject=subject,
             html=html_content,
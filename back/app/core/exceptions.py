@@ -131,6 +131,11 @@ class ItemNotFound(ProjectAPIException):
     errors = {"general": ["Item not found."]}
 
 
+class ServiceUnavailable(ProjectAPIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    errors = {"general": ["This service is temporarily unavailable. Please retry later."]}
+
+
 ##########################################################################################
 # Utils
 ##########################################################################################
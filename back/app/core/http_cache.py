@@ -0,0 +1,275 @@
+# pyright: reportUnknownMemberType=false
+"""
+HTTP caching of read endpoints, cf. the `http_cache` route decorator:
+
+    @router.get("/{badge_id}", response_model=BadgeOut)
+    @http_cache(Badge, User, schema=BadgeOut)
+    def read_badge(badge_id: SecretId, session: SessionDep): ...
+
+A response is identified by the request (path, query string, and `Authorization` header
+for per-user endpoints) and by the versions of the tables it is built from. The version
+of a table is a counter stored in Redis, so shared by all workers, and incremented each
+time a session commits changes to the table (cf. `invalidate`): flushed objects, and
+ORM `insert()`, `update()` and `delete()` statements executed by the session.
+- the weak ETag is derived from this identity: a request with a matching
+  `If-None-Match` header gets a 304, without any query nor serialization
+- rendered bodies are kept in an in-process LRU, backed by Redis
+
+Session events are registered when this module is imported (API and Celery processes).
+Changes made without an ORM session (raw SQL, other processes) and time-dependent values
+like `expired` are only seen after HTTP_CACHE_TTL, as the ETag also changes with time.
+NOTE: route dependencies (e.g. authentication) still run before the cache is checked.
+"""
+
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache, wraps
+from threading import Lock
+from typing import Any, NamedTuple
+
+from fastapi import Request, Response, status
+from loguru import logger
+from pydantic import TypeAdapter
+from redis import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy import inspect as inspect_object
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Name of the parameter added to decorated routes, to get the request
+REQUEST_PARAM = "http_cache_request"
+# Key of `session.info` holding the tables changed by the current transaction
+CHANGED_TABLES_KEY = "http_cache_changed_tables"
+
+# Bodies are stored as bytes. Commits wait for invalidations: keep them short.
+redis = Redis.from_url(
+    url=settings.REDIS_URI,
+    socket_timeout=settings.HTTP_CACHE_REDIS_TIMEOUT.total_seconds(),
+    socket_connect_timeout=settings.HTTP_CACHE_REDIS_TIMEOUT.total_seconds(),
+)
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    expire_at: float  # monotonic time
+
+
+class LocalCache:
+    """Bounded in-process LRU of rendered bodies, by ETag."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.lock = Lock()  # sync routes run in a thread pool
+
+    def get(self, etag: str) -> bytes | None:
+        with self.lock:
+            entry = self.entries.get(etag)
+            if entry is None:
+                return None
+            if entry.expire_at < time.monotonic():
+                del self.entries[etag]
+                return None
+            self.entries.move_to_end(etag)
+            return entry.body
+
+    def set(self, etag: str, body: bytes, ttl: float) -> None:
+        with self.lock:
+            self.entries[etag] = CacheEntry(body, time.monotonic() + ttl)
+            self.entries.move_to_end(etag)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache(max_size=settings.HTTP_CACHE_LOCAL_SIZE)
+
+
+def version_key(table: str) -> str:
+    return f"{settings.HTTP_CACHE_PREFIX}version:{table}"
+
+
+def body_key(etag: str) -> str:
+    return f"{settings.HTTP_CACHE_PREFIX}body:{etag}"
+
+
+def invalidate(*tables: str) -> None:
+    """Increment the version of the given tables, so that cached responses built from
+    them are no longer served."""
+
+    if not settings.HTTP_CACHE_ENABLED:
+        return
+    try:
+        with redis.pipeline(transaction=False) as pipe:
+            for table in tables:
+                pipe.incr(version_key(table))
+            pipe.execute()
+    except RedisError as e:
+        # Cached responses will be served until they expire
+        logger.warning(f"Unable to invalidate HTTP cache of {tables}: {e}")
+
+
+##########################################################################################
+# Session events: invalidate the tables changed by committed transactions
+##########################################################################################
+
+
+def changed_tables(session: Session) -> set[str]:
+    return session.info.setdefault(CHANGED_TABLES_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def collect_flushed_tables(session: Session, _: UOWTransaction) -> None:
+    # (new, dirty and deleted objects are still the flushed ones at this point)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        changed_tables(session).update(
+            table.name for table in inspect_object(obj).mapper.tables
+        )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_statement_tables(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        changed_tables(state.session).add(state.statement.table.name)  # type: ignore
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_tables(session: Session) -> None:
+    if tables := session.info.pop(CHANGED_TABLES_KEY, None):
+        invalidate(*sorted(tables))
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_tables(session: Session) -> None:
+    session.info.pop(CHANGED_TABLES_KEY, None)
+
+
+def make_etag(request: Request, versions: list[Any], vary_on_auth: bool) -> str:
+    ttl = settings.HTTP_CACHE_TTL.total_seconds()
+    identity = [
+        request.method,
+        request.url.path,
+        request.url.query,
+        *(str(version) for version in versions),
+        str(int(time.time() // ttl)),  # bounds the life of time-dependent values
+    ]
+    if vary_on_auth:
+        identity.append(request.headers.get("authorization", ""))
+    digest = hashlib.blake2b("\n".join(identity).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of the ETag with the `If-None-Match` header."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+@lru_cache
+def get_adapter(schema: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(schema)
+
+
+def render(result: Any, schema: Any) -> bytes | None:
+    """JSON body of the route result, as rendered by FastAPI, or None if not cacheable."""
+
+    if isinstance(result, Response):
+        is_json = result.media_type == "application/json"
+        return bytes(result.body) if result.status_code == 200 and is_json else None
+    adapter = get_adapter(schema)
+    return adapter.dump_json(
+        adapter.validate_python(result, from_attributes=True), by_alias=True
+    )
+
+
+def get_versions(tables: list[str]) -> list[Any] | None:
+    """Current versions of the given tables, or None if Redis is unavailable."""
+    try:
+        return redis.mget([version_key(table) for table in tables])  # type: ignore
+    except RedisError as e:
+        logger.warning(f"HTTP cache unavailable: {e}")
+        return None
+
+
+def get_body(etag: str) -> bytes | None:
+    body = local_cache.get(etag)
+    if body is None:
+        try:
+            body = redis.get(body_key(etag))  # type: ignore
+        except RedisError as e:
+            logger.warning(f"Unable to read HTTP cache: {e}")
+        if body is not None:
+            local_cache.set(etag, body, settings.HTTP_CACHE_TTL.total_seconds())
+    return body
+
+
+def set_body(etag: str, body: bytes) -> None:
+    local_cache.set(etag, body, settings.HTTP_CACHE_TTL.total_seconds())
+    try:
+        redis.set(body_key(etag), body, ex=settings.HTTP_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Unable to write HTTP cache: {e}")
+
+
+def http_cache(
+    *models: type[Any], schema: Any = None, vary_on_auth: bool = False
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Cache the responses of the decorated (sync, GET) route, built from rows of `models`.
+    `schema` is the response model of the route, used to render the returned value
+    (not needed if the route returns a JSON Response).
+    With `vary_on_auth`, responses are cached for each `Authorization` header.
+    """
+
+    tables = [model.__tablename__ for model in models]
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request: Request = kwargs.pop(REQUEST_PARAM)
+            if not settings.HTTP_CACHE_ENABLED:
+                return func(*args, **kwargs)
+            versions = get_versions(tables)
+            if versions is None:
+                return func(*args, **kwargs)
+
+            etag = make_etag(request, versions, vary_on_auth)
+            # Clients may keep the response, but must check it is still valid
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if etag_matches(request, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            body = get_body(etag)
+            if body is None:
+                result = func(*args, **kwargs)
+                body = render(result, schema)
+                if body is None:
+                    return result
+                set_body(etag, body)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        # FastAPI reads the signature to inject parameters: add the request to it
+        signature = inspect.signature(func)
+        request_param = inspect.Parameter(
+            REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        )
+        wrapper.__signature__ = signature.replace(  # type: ignore
+            parameters=[*signature.parameters.values(), request_param]
+        )
+        return wrapper
+
+    return decorator
@@ -1,8 +1,11 @@
 import inspect
 import logging
+from functools import cache
 
 from loguru import logger
 
+from app.core.config import get_settings
+
 
 class InterceptHandler(logging.Handler):
     """
@@ -30,3 +33,16 @@ class InterceptHandler(logging.Handler):
 def intercept_logs_toward_loguru_sinks() -> None:
     """Execute this function whenever logs should be configured"""
     logging.basicConfig(handlers=[InterceptHandler()], level=logging.INFO, force=True)
+
+
+@cache
+def configure_logfire() -> None:
+    """
+    Configure logfire once per process, whichever module needs it first (the API uses
+    it from both the database and the app). logfire is slow to import, so it is only
+    imported when USE_LOGFIRE is True.
+    """
+    import logfire
+
+    logfire.configure(token=get_settings().LOGFIRE_TOKEN)
+    logger.configure(handlers=[logfire.loguru_handler()])
@@ -0,0 +1,190 @@
+"""
+Statistical profiling of requests, without any external service:
+- `ProfilingMiddleware` profiles a share of requests (PROFILING_SAMPLE_RATE), and the
+  requests of superusers sending the PROFILING_HEADER header
+- while the request runs, a thread samples the stacks of the other threads every
+  PROFILING_INTERVAL (idle threads are ignored)
+- stacks are written in PROFILING_DIR in the "collapsed" format (`a;b;c <count>` lines),
+  which can be opened with https://www.speedscope.app or flamegraph.pl
+
+NOTE: all threads of the worker are sampled, so concurrent requests may appear in the
+same profile. Profiles are meant for local investigation of slow endpoints.
+"""
+
+import random
+import sys
+import threading
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+from secrets import token_hex
+from types import FrameType
+
+from fastapi.security.utils import get_authorization_scheme_param
+from pydantic import Field
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import get_current_superuser, get_current_user
+from app.core.config import get_settings
+from app.core.database import SessionFactory
+from app.core.exceptions import ItemNotFound, ProjectAPIException
+from app.schemas.base import MySchema
+from app.utils.timezone import now_utc
+
+settings = get_settings()
+
+PROFILE_FILE_HEADER = "X-Profile-File"
+PROFILE_SUFFIX = ".collapsed.txt"
+
+# Leaf frames of threads waiting for work: (module, function)
+IDLE_FRAMES = {("selectors", "select"), ("threading", "wait")}
+
+
+def collapse(frame: FrameType) -> str | None:
+    """The stack of a frame, from the root, as `module:function;...` (None if idle)."""
+
+    if (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES:
+        return None
+    names: list[str] = []
+    current: FrameType | None = frame
+    while current is not None:
+        names.append(f"{current.f_globals.get('__name__')}:{current.f_code.co_qualname}")
+        current = current.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Count the stacks of the other threads, every `interval` seconds, until stopped."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != self.ident and (stack := collapse(frame)) is not None:
+                self.stacks[stack] += 1
+
+    def stop(self) -> Counter[str]:
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+##########################################################################################
+# Profile files
+##########################################################################################
+
+
+class ProfileOut(MySchema):
+    name: str
+    size: int = Field(description="In bytes")
+    created_at: datetime
+
+
+def profile_name(scope: Scope) -> str:
+    path = scope["path"].strip("/").replace("/", "-") or "root"
+    return (
+        f"{now_utc():%Y%m%dT%H%M%S}-{scope['method']}-{path}-{token_hex(3)}"
+        f"{PROFILE_SUFFIX}"
+    )
+
+
+def write_profile(name: str, stacks: Counter[str]) -> None:
+    """Write the stacks, and delete the oldest files over PROFILING_MAX_FILES."""
+
+    directory = settings.PROFILING_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(
+        "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+    )
+    paths = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=_mtime, reverse=True)
+    for path in paths[settings.PROFILING_MAX_FILES :]:
+        path.unlink(missing_ok=True)
+
+
+def _mtime(path: Path) -> float:
+    return path.stat().st_mtime
+
+
+def list_profiles() -> list[ProfileOut]:
+    """Profile files, the latest first."""
+
+    directory = settings.PROFILING_DIR
+    if not directory.is_dir():
+        return []
+    return [
+        ProfileOut(
+            name=path.name,
+            size=path.stat().st_size,
+            created_at=datetime.fromtimestamp(path.stat().st_mtime, UTC),
+        )
+        for path in sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=_mtime, reverse=True)
+    ]
+
+
+def get_profile_path(name: str) -> Path:
+    path = settings.PROFILING_DIR / name
+    # (the name must not be a path, e.g. "../../etc/passwd")
+    if Path(name).name != name or not name.endswith(PROFILE_SUFFIX) or not path.is_file():
+        raise ItemNotFound()
+    return path
+
+
+##########################################################################################
+# Middleware
+##########################################################################################
+
+
+def is_superuser(token: str) -> bool:
+    with SessionFactory() as session:
+        try:
+            get_current_superuser(get_current_user(session, token))
+        except ProjectAPIException:
+            return False
+    return True
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self, app: ASGIApp, sample_rate: float = settings.PROFILING_SAMPLE_RATE
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def should_profile(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        headers = Headers(scope=scope)
+        if settings.PROFILING_HEADER not in headers:
+            return False
+        scheme, token = get_authorization_scheme_param(headers.get("authorization"))
+        return scheme.lower() == "bearer" and await run_in_threadpool(is_superuser, token)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope)
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_FILE_HEADER, name)
+            await send(message)
+
+        sampler = Sampler(settings.PROFILING_INTERVAL.total_seconds())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            stacks = await run_in_threadpool(sampler.stop)
+            await run_in_threadpool(write_profile, name, stacks)
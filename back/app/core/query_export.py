@@ -0,0 +1,139 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Generator, Iterator
+from typing import Annotated, Any, Literal, TypeVar
+
+import anyio
+from fastapi import Depends
+from fastapi.responses import StreamingResponse
+from pydantic import Field
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.query_projection import PROJECTED, get_nested_schema, unflatten
+from app.models.base import MyModel
+from app.schemas.base import MySchema
+
+T = TypeVar("T", bound=MyModel)
+U = TypeVar("U", bound=MySchema)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def flatten(values: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+    """Flatten nested values for CSV columns, e.g. {"owner": {"id": 1}} -> {"owner.id": 1}"""
+
+    flat: dict[str, Any] = {}
+    for key, value in values.items():
+        if isinstance(value, dict):
+            flat |= flatten(value, prefix=f"{prefix}{key}.")  # type: ignore
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def csv_fieldnames(schema: type[MySchema], prefix: str = "") -> list[str]:
+    """CSV columns of the schema, in the order of `model_dump`, as named by `flatten`."""
+
+    fieldnames: list[str] = []
+    for name, field in schema.model_fields.items():
+        alias = field.serialization_alias or field.alias or name
+        nested_schema, _ = get_nested_schema(field.annotation)
+        if nested_schema is None:
+            fieldnames.append(f"{prefix}{alias}")
+        else:
+            fieldnames += csv_fieldnames(nested_schema, prefix=f"{prefix}{alias}.")
+    for name, computed_field in schema.model_computed_fields.items():
+        fieldnames.append(f"{prefix}{computed_field.alias or name}")
+    return fieldnames
+
+
+class Exporter(MySchema):
+    format: Literal["ndjson", "csv"] = Field(
+        default="ndjson", description="Export format: one JSON object per line, or CSV"
+    )
+
+    def iter_batches(
+        self, query: Select[tuple[T]], schema: type[U], session: Session
+    ) -> Iterator[list[U]]:
+        """
+        Fetch all items of the given query, by batches of EXPORT_BATCH_SIZE.
+        Rows are read through a server-side cursor, so that memory does not depend on the
+        number of rows.
+        """
+
+        batch_size = get_settings().EXPORT_BATCH_SIZE
+        result = session.execute(query.execution_options(yield_per=batch_size))
+        # (projected queries return rows of labeled columns instead of ORM objects)
+        if query.get_execution_options().get(PROJECTED):
+            for rows in result.mappings().partitions():
+                yield [schema.model_validate(unflatten(row)) for row in rows]
+        else:
+            for db_items in result.scalars().partitions():
+                yield [schema.model_validate(db_item) for db_item in db_items]
+
+    def iter_ndjson(self, batches: Iterator[list[U]]) -> Iterator[str]:
+        for items in batches:
+            yield "".join(f"{item.model_dump_json(by_alias=True)}\n" for item in items)
+
+    def iter_csv(self, batches: Iterator[list[U]], schema: type[U]) -> Iterator[str]:
+        buffer = io.StringIO()
+        # Columns come from the schema: the header is written even without any row, and
+        # a null nested object (e.g. no owner) leaves its columns empty
+        writer = csv.DictWriter(
+            buffer, fieldnames=csv_fieldnames(schema), restval="", extrasaction="ignore"
+        )
+        writer.writeheader()
+        for items in batches:
+            for item in items:
+                writer.writerow(flatten(item.model_dump(mode="json", by_alias=True)))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()  # header only
+
+    def iter_content(self, query: Select[tuple[T]], schema: type[U]) -> Generator[str]:
+        """
+        The exported file, read in a session of its own: the session of the request is
+        already closed when the response is streamed (it is a dependency with yield).
+        """
+
+        with Session(engine) as session:
+            batches = self.iter_batches(query, schema, session)
+            if self.format == "csv":
+                yield from self.iter_csv(batches, schema)
+            else:
+                yield from self.iter_ndjson(batches)
+
+    async def stream(self, content: Generator[str]) -> AsyncIterator[str]:
+        """
+        Iterate over the content in the thread pool, and close it when done, including
+        when the client disconnects: its session, connection and cursor are released.
+        """
+
+        try:
+            async for chunk in iterate_in_threadpool(content):
+                yield chunk
+        finally:
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(content.close)
+
+    def export(
+        self, query: Select[tuple[T]], schema: type[U], filename: str
+    ) -> StreamingResponse:
+        """Stream all items of the given query, as a file in the requested format."""
+
+        return StreamingResponse(
+            self.stream(self.iter_content(query, schema)),
+            media_type=MEDIA_TYPES[self.format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}.{self.format}"'
+            },
+        )
+
+
+ExportDep = Annotated[Exporter, Depends()]
@@ -0,0 +1,141 @@
+"""
+Per-request SQL metrics, recorded from the timing of statements (cf. query_timing.py):
+- number of statements and total DB time, sent in a `Server-Timing` header (if
+  DATABASE_SERVER_TIMING) and logged (if DATABASE_LOG_QUERY_STATS)
+- N+1 detection: the same statement executed with DATABASE_N_PLUS_ONE_THRESHOLD different
+  parameters (or more) in a request, typically a lazy load in a loop, is logged as a
+  warning
+
+Statements are recorded in the `QueryStats` of the current request (a context variable,
+also seen from the threads running sync endpoints), and in the ones of `record_queries()`,
+used by tests to assert the number of statements of an endpoint.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import Connection
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.query_timing import on_query
+
+settings = get_settings()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0  # in seconds
+    # statement -> hashes of its distinct parameters
+    parameters: defaultdict[str, set[int]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+
+    def add(self, statement: str, parameters: Any, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.parameters[statement].add(hash(repr(parameters)))
+
+    @property
+    def statements(self) -> list[str]:
+        return list(self.parameters)
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Statements executed with at least `threshold` distinct parameters."""
+        return {
+            statement: len(parameters)
+            for statement, parameters in self.parameters.items()
+            if len(parameters) >= threshold
+        }
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+recorders: list[QueryStats] = []  # cf. record_queries()
+
+
+@on_query
+def record_query(
+    _conn: Connection,
+    statement: str,
+    parameters: Any,
+    _executemany: bool,
+    duration: float,
+) -> None:
+    if (stats := current_stats.get()) is not None:
+        stats.add(statement, parameters, duration)
+    for stats in recorders:
+        stats.add(statement, parameters, duration)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryStats]:
+    """Record all statements executed while in the block, from any thread."""
+
+    stats = QueryStats()
+    recorders.append(stats)
+    try:
+        yield stats
+    finally:
+        recorders.remove(stats)
+
+
+##########################################################################################
+# Middleware
+##########################################################################################
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+
+        async def send_with_header(message: Message) -> None:
+            # (statements executed later, e.g. by streamed responses, are only logged)
+            if (
+                message["type"] == "http.response.start"
+                and settings.DATABASE_SERVER_TIMING
+            ):
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", stats.server_timing()
+                )
+            await send(message)
+
+        token = current_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            current_stats.reset(token)
+            log_stats(stats, f"{scope['method']} {scope['path']}")
+
+
+def log_stats(stats: QueryStats, request: str) -> None:
+    request_logger = logger.bind(
+        db_queries=stats.count, db_duration_ms=round(stats.duration * 1000, 1)
+    )
+    if settings.DATABASE_LOG_QUERY_STATS:
+        # (formatted by loguru only if a handler accepts DEBUG messages)
+        request_logger.debug(
+            "{}: {} queries in {:.1f} ms", request, stats.count, stats.duration * 1000
+        )
+    for statement, count in stats.repeated(
+        settings.DATABASE_N_PLUS_ONE_THRESHOLD
+    ).items():
+        request_logger.warning(
+            f"Possible N+1 query on {request}, executed {count} times: {statement}"
+        )
@@ -1,12 +1,13 @@
-from typing import Annotated, Generic, TypeVar
+from typing import Annotated, Any, Generic, TypeVar
 
-from fastapi import Depends
+from fastapi import Depends, Response
 from pydantic import Field
 from sqlalchemy import select
 from sqlalchemy.sql import Select, func
 
 from app.core.config import get_settings
 from app.core.database import SessionDep
+from app.core.query_projection import PROJECTED, unflatten
 from app.models.base import MyModel
 from app.schemas.base import MySchema
 
@@ -74,7 +75,12 @@ class Paginator(MySchema):
         result = session.execute(query.offset(offset).limit(self.page_size))
 
         # Fetch the paginated items
-        db_items = list(result.scalars().all())
+        # (projected queries return rows of labeled columns instead of ORM objects)
+        db_items: list[Any]
+        if query.get_execution_options().get(PROJECTED):
+            db_items = [unflatten(row) for row in result.mappings()]
+        else:
+            db_items = list(result.scalars().all())
 
         # Transform database items to schemas
         items = [schema.model_validate(db_item) for db_item in db_items]
@@ -84,7 +90,9 @@ class Paginator(MySchema):
         end_index = min(offset + self.page_size, total_items)
 
         # Return the paginated response using the Page model
-        return Page[U](
+        # NOTE: the class is parametrized with the actual schema (and cached by pydantic),
+        # so that the page can be serialized without going through FastAPI again.
+        return Page[schema](  # type: ignore
             items=items,
             total_items=total_items,
             start_index=start_index,
@@ -96,5 +104,22 @@ class Paginator(MySchema):
             current_page=current_page,  # can differ from the requested page
         )
 
+    def paginate_response(
+        self,
+        query: Select[tuple[T]],
+        schema: type[U],
+        session: SessionDep,
+    ) -> Response:
+        """Same as `paginate`, but return the page already serialized to JSON.
+        Items are validated once (ORM object -> schema) and the page is dumped straight to
+        bytes. FastAPI skips its own validation and serialization for Response objects:
+        the route `response_model` is then only used for documentation.
+        """
+
+        page = self.paginate(query, schema, session)
+        return Response(
+            content=page.model_dump_json(by_alias=True), media_type="application/json"
+        )
+
 
 PaginationDep = Annotated[Paginator, Depends()]
@@ -0,0 +1,91 @@
+import types
+from typing import Any, TypeVar, Union, get_args, get_origin
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import RelationshipProperty, aliased
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.base import MyModel
+from app.schemas.base import MySchema
+
+T = TypeVar("T", bound=MyModel)
+
+# Execution option flagging queries built by `project`, whose rows are not ORM objects
+PROJECTED = "projected"
+# Separator of nested fields in column labels, as in Searcher (e.g. "owner__first_name")
+SEPARATOR = "__"
+
+
+def get_nested_schema(annotation: Any) -> tuple[type[MySchema] | None, bool]:
+    """Return the schema of a nested field (if any), and whether it is optional."""
+
+    args = (
+        get_args(annotation) if get_origin(annotation) in (Union, types.UnionType) else ()
+    )
+    optional = type(None) in args
+    for candidate in args or (annotation,):
+        if isinstance(candidate, type) and issubclass(candidate, MySchema):
+            return candidate, optional
+    return None, optional
+
+
+def project(model: type[T], schema: type[MySchema]) -> Select[Any]:
+    """
+    Build a query selecting only the columns needed by the given schema, instead of full
+    ORM entities: rows are lightweight, and nothing goes into the session identity map.
+    Fields which are schemas themselves (e.g. `BadgeOwner`) are read through a join on
+    the model relationship of the same name, in the same query.
+    Columns are labeled with their path, cf. `unflatten` to get back nested values.
+    NOTE: the query can still be filtered or ordered using `model` attributes.
+    """
+
+    query = select().select_from(model)
+
+    def add_columns(entity: Any, schema: type[MySchema], prefix: str) -> None:
+        nonlocal query
+        for name, field in schema.model_fields.items():
+            nested_schema, optional = get_nested_schema(field.annotation)
+            if nested_schema is None:
+                column: ColumnElement[Any] = getattr(entity, name)
+                query = query.add_columns(column.label(f"{prefix}{name}"))
+                continue
+
+            relationship = getattr(entity, name).property
+            if not isinstance(relationship, RelationshipProperty) or relationship.uselist:
+                raise ValueError(
+                    f"'{name}' must be a many-to-one relationship to be projected."
+                )
+            target = aliased(relationship.mapper.class_)
+            query = query.join(target, getattr(entity, name), isouter=optional)
+            add_columns(target, nested_schema, f"{prefix}{name}{SEPARATOR}")
+
+    add_columns(model, schema, prefix="")
+    return query.execution_options(**{PROJECTED: True})
+
+
+def unflatten(row: RowMapping) -> dict[str, Any]:
+    """
+    Turn a row of a projected query into nested dicts, ready to be validated by the
+    schema, e.g. {"id": ..., "owner__id": ...} -> {"id": ..., "owner": {"id": ...}}.
+    A nested object whose values are all NULL (outer join without match) becomes None.
+    """
+
+    values: dict[str, Any] = {}
+    for label, value in row.items():
+        *path, name = label.split(SEPARATOR)
+        parent = values
+        for step in path:
+            parent = parent.setdefault(step, {})
+        parent[name] = value
+
+    def clean(values: dict[str, Any]) -> dict[str, Any] | None:
+        for key, value in values.items():
+            if isinstance(value, dict):
+                values[key] = clean(value)  # type: ignore
+        return values if any(value is not None for value in values.values()) else None
+
+    for key, value in values.items():
+        if isinstance(value, dict):
+            values[key] = clean(value)  # type: ignore
+    return values
@@ -0,0 +1,60 @@
+"""
+Timing of SQL statements, from SQLAlchemy engine events, shared by the modules using
+their durations (cf. app/core/query_metrics.py and app/core/slow_queries.py): each one
+registers a callback with `on_query`, called after each statement with its duration.
+"""
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Connection, event
+from sqlalchemy.engine import Engine, ExceptionContext
+
+from app.core.database import engine
+
+# (a single value, not a stack: statements of a connection are not nested)
+START_TIME_KEY = "query_timing_start_time"
+
+# (connection, statement, parameters, executemany, duration in seconds)
+QueryCallback = Callable[[Connection, str, Any, bool, float], None]
+
+callbacks: list[QueryCallback] = []
+
+
+def on_query(callback: QueryCallback) -> QueryCallback:
+    """Call the given function after each statement (usable as a decorator)."""
+    callbacks.append(callback)
+    return callback
+
+
+def before_cursor_execute(conn: Connection, *_: Any) -> None:
+    conn.info[START_TIME_KEY] = time.perf_counter()
+
+
+def after_cursor_execute(
+    conn: Connection,
+    _cursor: Any,
+    statement: str,
+    parameters: Any,
+    _context: Any,
+    executemany: bool,
+) -> None:
+    duration = time.perf_counter() - conn.info.pop(START_TIME_KEY)
+    for callback in callbacks:
+        callback(conn, statement, parameters, executemany, duration)
+
+
+def handle_error(context: ExceptionContext) -> None:
+    # (after_cursor_execute is not called for failed statements)
+    if context.connection is not None:
+        context.connection.info.pop(START_TIME_KEY, None)
+
+
+def instrument(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+instrument(engine)
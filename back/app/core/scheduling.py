@@ -1,44 +1,273 @@
+import heapq
+import os
+import socket
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
 from celery import beat  # type: ignore
-from celery.schedules import crontab, schedule  # type: ignore
-from sqlalchemy import select
+from loguru import logger
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.core.database import engine
-from app.models.periodic_task import PeriodicTask, ScheduleType
+from app.models.beat_leader_lease import BeatLeaderLease
+from app.models.periodic_task import PeriodicTask
+
+settings = get_settings()
 
 
 class MyDatabaseScheduler(beat.Scheduler):
+    """
+    Celery beat scheduler reading its entries from the `PeriodicTask` table.
+    Database changes are picked up every BEAT_REFRESH_DELAY, without restarting beat.
+    Run states are written back in bulk every BEAT_SYNC_DELAY, so that a restart does
+    not trigger all tasks at once.
+    Several replicas can run for high availability: only the holder of the leader lease
+    dispatches tasks, the others take over when the lease expires.
+    Entries are kept in a min-heap keyed by their next run time (precomputed when a
+    task is saved), so that a tick only looks at due entries instead of all of them.
+    """
+
+    sync_every = settings.BEAT_SYNC_DELAY.total_seconds()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Must be set before calling super(), which calls `setup_schedule`
+        self._versions: dict[str, datetime] = {}  # task name -> modified_at
+        self._change_marker: tuple[Any, ...] | None = None
+        self._last_refresh = 0.0
+        self._unsynced: set[str] = set()  # names of entries with an unsaved run state
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self._last_lease_renewal = 0.0
+        # Min-heap of (next run timestamp, task name, generation). An item is outdated
+        # when its generation is not the current one of the entry (changed or removed)
+        self._run_heap: list[tuple[float, str, int]] = []
+        self._generations: dict[str, int] = {}
+        super().__init__(*args, **kwargs)
+
     def setup_schedule(self) -> None:
         """Load periodic tasks from the database and populate Celery's schedule."""
 
         with Session(engine) as session:
-            stmt = select(PeriodicTask).where(PeriodicTask.is_active)
-            tasks = session.execute(stmt).scalars().all()
-            for task in tasks:
-                self.schedule[task.name] = self.create_schedule_entry(task)  # type: ignore
+            self.refresh_schedule(session)
 
-    def create_schedule_entry(self, task: PeriodicTask) -> beat.ScheduleEntry:
-        """Convert a `PeriodicTask` instance into a Celery schedule entry."""
+    def tick(self, *args: Any, **kwargs: Any) -> float:
+        """
+        Renew the leader lease and refresh the schedule if needed, then send due
+        entries. Replicas that are not the leader never dispatch any task.
+        """
+
+        # Renew well before the lease expires, so that a single failure is harmless
+        renewal_delay = settings.BEAT_LEADER_LEASE.total_seconds() / 3
+        if time.monotonic() - self._last_lease_renewal >= renewal_delay:
+            self.renew_leadership()
+        if not self.is_leader:
+            return renewal_delay
+
+        refresh_delay = settings.BEAT_REFRESH_DELAY.total_seconds()
+        if time.monotonic() - self._last_refresh >= refresh_delay:
+            with Session(engine) as session:
+                self.refresh_schedule(session)
+
+        # Never sleep longer than these delays, so that they are respected
+        return min(self._tick_schedule(), refresh_delay, renewal_delay)
+
+    def _tick_schedule(self) -> float:
+        """
+        Send due entries, and return the delay until the next one.
+        Replaces Celery's tick, which compares the whole schedule to its previous state
+        on each call. Here, each sent entry costs O(log n).
+        """
+
+        heap = self._run_heap
+        while heap:
+            run_at, name, generation = heap[0]
+            if self._generations.get(name) != generation:
+                heapq.heappop(heap)  # outdated
+                continue
+            delay = run_at - time.time()
+            if delay > 0:
+                return min(delay, self.max_interval)
+
+            heapq.heappop(heap)
+            entry = self.schedule[name]
+            # The heap is only a hint: the schedule itself has the last word
+            is_due, next_time_to_run = self.is_due(entry)
+            if is_due:
+                self.reserve(entry)
+                self.apply_entry(entry, producer=self.producer)
+            self._push(name, time.time() + next_time_to_run)
+        return self.max_interval
+
+    def _push(self, name: str, run_at: float) -> None:
+        """(Re)schedule an entry in the heap, outdating its previous item if any."""
+
+        generation = self._generations.get(name, 0) + 1
+        self._generations[name] = generation
+        heapq.heappush(self._run_heap, (run_at, name, generation))
+
+    def renew_leadership(self) -> None:
+        """Acquire or renew the leader lease, and handle leadership changes."""
+
+        self._last_lease_renewal = time.monotonic()
+        try:
+            with Session(engine) as session:
+                is_leader = BeatLeaderLease.acquire(
+                    self.holder, settings.BEAT_LEADER_LEASE, session
+                )
+        except SQLAlchemyError as e:
+            # Without certainty, stepping down is safer than duplicating tasks
+            logger.error(f"Unable to renew beat leader lease: {e}")
+            is_leader = False
+
+        if is_leader and not self.is_leader:
+            logger.info(f"Beat {self.holder} is now the leader.")
+            # Run states may have been updated by the previous leader: reload everything
+            self.schedule.clear()
+            self._versions, self._change_marker = {}, None
+            self._run_heap.clear()
+            self._generations.clear()
+            with Session(engine) as session:
+                self.refresh_schedule(session)
+        elif not is_leader and self.is_leader:
+            logger.warning(f"Beat {self.holder} lost the leadership.")
+            self._unsynced.clear()  # the new leader owns run states from now
+        self.is_leader = is_leader
+
+    def close(self) -> None:
+        """Save run states, then release the lease so that failover is immediate."""
 
-        if task.schedule_type == ScheduleType.INTERVAL:
-            celery_schedule = schedule(run_every=task.interval)
-        elif task.schedule_type == ScheduleType.CRONTAB:
-            parts = task.crontab_expression.split()  # type: ignore
-            celery_schedule = crontab(
-                minute=parts[0],
-                hour=parts[1],
-                day_of_month=parts[2],
-                month_of_year=parts[3],
-                day_of_week=parts[4],
+        super().close()
+        if self.is_leader:
+            with Session(engine) as session:
+                BeatLeaderLease.release(self.holder, session)
+            self.is_leader = False
+
+    def refresh_schedule(self, session: Session) -> None:
+        """
+        Apply database changes to the schedule.
+        A cheap change marker is checked first, so that nothing is loaded when the table
+        did not change. Otherwise, only added, changed, or removed entries are handled.
+        """
+
+        self._last_refresh = time.monotonic()
+
+        # Any insert/update changes the max, any delete changes the count.
+        marker_stmt = select(func.count(), func.max(PeriodicTask.modified_at))
+        change_marker = tuple(session.execute(marker_stmt).one())
+        if change_marker == self._change_marker:
+            return
+        self._change_marker = change_marker
+
+        versions_stmt = select(PeriodicTask.name, PeriodicTask.modified_at).where(
+            PeriodicTask.is_active
+        )
+        versions: dict[str, datetime] = dict(
+            session.execute(versions_stmt).tuples().all()
+        )
+        removed = self._versions.keys() - versions.keys()
+        changed = [
+            name
+            for name, modified_at in versions.items()
+            if self._versions.get(name) != modified_at
+        ]
+
+        for name in removed:
+            self.schedule.pop(name, None)
+            self._generations.pop(name, None)  # its heap item is now outdated
+
+        if changed:
+            stmt = select(PeriodicTask).where(PeriodicTask.name.in_(changed))
+            for task in session.execute(stmt).scalars():
+                entry = self.create_schedule_entry(task)
+                if task.name in self.schedule:
+                    # keeps run state (last_run_at, total_run_count) of the existing entry
+                    self.schedule[task.name].update(entry)
+                    # the schedule changed: let `is_due` tell when it runs next
+                    self._push(task.name, time.time())
+                else:
+                    self.schedule[task.name] = entry
+                    self._push(
+                        task.name,
+                        (task.next_run_at or task.compute_next_run_at())
+                        .replace(tzinfo=UTC)
+                        .timestamp(),
+                    )
+
+        self._versions = versions
+        if removed or changed:
+            logger.info(
+                f"Beat schedule refreshed: {len(changed)} added or changed, "
+                f"{len(removed)} removed."
             )
-        else:
-            raise ValueError(f"Invalid schedule type for task: {task.name}")
+
+    def reserve(self, entry: beat.ScheduleEntry) -> beat.ScheduleEntry:
+        """Called by Celery each time an entry is sent: its run state changed."""
+
+        self._unsynced.add(entry.name)
+        return super().reserve(entry)
+
+    def sync(self) -> None:
+        """Write the run state of entries sent since the last sync, in a single batch."""
+
+        entries = [
+            self.schedule[name] for name in self._unsynced if name in self.schedule
+        ]
+        if not entries:
+            return
+
+        table = PeriodicTask.__table__
+        now, zero = datetime.now(UTC), timedelta(0)
+        stmt = (
+            update(table)
+            .where(table.c.name == bindparam("b_name"))
+            .values(
+                last_run_at=bindparam("b_last_run_at"),
+                total_run_count=bindparam("b_total_run_count"),
+                next_run_at=bindparam("b_next_run_at"),
+                # run state is not a change of the task itself (cf. refresh_schedule)
+                modified_at=table.c.modified_at,
+            )
+        )
+        params = [
+            {
+                "b_name": entry.name,
+                "b_last_run_at": entry.last_run_at.astimezone(UTC).replace(tzinfo=None),
+                "b_total_run_count": entry.total_run_count,
+                "b_next_run_at": (
+                    now + max(entry.schedule.remaining_estimate(entry.last_run_at), zero)
+                ).replace(tzinfo=None),
+            }
+            for entry in entries
+        ]
+        try:
+            with Session(engine) as session:
+                session.execute(stmt, params)
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Unable to save beat run state: {e}. Retrying on next sync...")
+            return
+        self._unsynced.clear()
+
+    def create_schedule_entry(self, task: PeriodicTask) -> beat.ScheduleEntry:
+        """Convert a `PeriodicTask` instance into a Celery schedule entry."""
 
         return beat.ScheduleEntry(
             name=task.name,
             task=task.task,
-            schedule=celery_schedule,
+            schedule=task.celery_schedule,
             args=task.args,
             kwargs=task.kwargs,
             options={"expires": task.start_at},
+            last_run_at=(
+                # crontab fields are matched in the timezone of last_run_at
+                task.last_run_at.replace(tzinfo=UTC).astimezone(self.app.timezone)
+                if task.last_run_at
+                else None
+            ),
+            total_run_count=task.total_run_count,
+            app=self.app,
         )
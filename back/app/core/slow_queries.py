@@ -0,0 +1,143 @@
+"""
+Slow query log: statements taking more than SLOW_QUERY_THRESHOLD are
+- logged with their normalized SQL and their parameters
+- kept in a ring buffer of SLOW_QUERY_LOG_SIZE entries (per worker process), exposed by
+  the /debug/slow-queries endpoint
+- for a share of them (SLOW_QUERY_EXPLAIN_RATE), completed with their plan, obtained with
+  `EXPLAIN (ANALYZE, BUFFERS)` on a separate connection, in a background thread
+
+EXPLAIN ANALYZE actually executes the statement (in a transaction which is rolled back
+anyway, within SLOW_QUERY_EXPLAIN_TIMEOUT): only SELECT statements without locking clause
+(`FOR UPDATE`...) nor call to a volatile function with side effects (`nextval()`...) are
+explained. At most one EXPLAIN runs at a time in each worker: slow queries occurring
+meanwhile are not explained.
+"""
+
+import random
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from loguru import logger
+from pydantic import Field
+from sqlalchemy import Connection
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.query_timing import on_query
+from app.schemas.base import MySchema
+from app.utils.timezone import now_utc
+
+settings = get_settings()
+
+SKIP_OPTION = "skip_slow_query_log"  # execution option of EXPLAIN statements
+MAX_PARAMETERS_LENGTH = 500
+
+# `IN (%(id_1)s::VARCHAR, %(id_2)s::VARCHAR, ...)` lists, as their size varies
+IN_LIST = re.compile(r"\(\s*%\(\w+\)s(?:::\w+)?(?:\s*,\s*%\(\w+\)s(?:::\w+)?)+\s*\)")
+WHITESPACES = re.compile(r"\s+")
+LOCKING_CLAUSE = re.compile(r"\bFOR\s+(NO\s+KEY\s+|KEY\s+)?(UPDATE|SHARE)\b", re.I)
+# Volatile functions which would have side effects (or different results) if run again
+VOLATILE_FUNCTION = re.compile(
+    r"\b(nextval|setval|random|gen_random_uuid|pg_(try_)?advisory_\w+|pg_notify"
+    r"|set_config|txid_current|pg_current_xact_id)\s*\(",
+    re.I,
+)
+
+
+class SlowQueryOut(MySchema):
+    statement: str = Field(description="Normalized SQL")
+    parameters: str
+    duration: float = Field(description="In milliseconds")
+    executed_at: datetime
+    plan: str | None = Field(description="Output of EXPLAIN (ANALYZE, BUFFERS), if any")
+
+
+slow_queries: deque[SlowQueryOut] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+explain_lock = threading.Lock()  # held while an EXPLAIN is pending
+
+
+def normalize(statement: str) -> str:
+    return IN_LIST.sub("(...)", WHITESPACES.sub(" ", statement).strip())
+
+
+def format_parameters(parameters: Any) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_PARAMETERS_LENGTH:
+        return f"{text[:MAX_PARAMETERS_LENGTH]}..."
+    return text
+
+
+def is_explainable(statement: str) -> bool:
+    return (
+        statement.upper().startswith("SELECT")
+        and not LOCKING_CLAUSE.search(statement)
+        and not VOLATILE_FUNCTION.search(statement)
+    )
+
+
+def read_slow_queries() -> list[SlowQueryOut]:
+    """Slow queries of this worker, the latest first."""
+    return list(reversed(slow_queries))
+
+
+##########################################################################################
+# Recording
+##########################################################################################
+
+
+@on_query
+def record_slow_query(
+    conn: Connection, statement: str, parameters: Any, executemany: bool, duration: float
+) -> None:
+    if (
+        duration < settings.SLOW_QUERY_THRESHOLD.total_seconds()
+        or conn.get_execution_options().get(SKIP_OPTION)
+    ):
+        return
+
+    slow_query = SlowQueryOut(
+        statement=normalize(statement),
+        parameters=format_parameters(parameters),
+        duration=round(duration * 1000, 1),
+        executed_at=now_utc(),
+        plan=None,
+    )
+    slow_queries.append(slow_query)
+    logger.bind(db_duration_ms=slow_query.duration).warning(
+        f"Slow query ({slow_query.duration} ms): {slow_query.statement} "
+        f"with parameters: {slow_query.parameters}"
+    )
+
+    if (
+        not executemany
+        and is_explainable(slow_query.statement)
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        and explain_lock.acquire(blocking=False)
+    ):
+        explain_executor.submit(explain, slow_query, statement, parameters)
+
+
+def explain(slow_query: SlowQueryOut, statement: str, parameters: Any) -> None:
+    """Add its plan to the slow query. Runs in the background."""
+
+    try:
+        with engine.connect().execution_options(**{SKIP_OPTION: True}) as connection:
+            timeout = settings.SLOW_QUERY_EXPLAIN_TIMEOUT
+            connection.exec_driver_sql(
+                "SELECT set_config('statement_timeout', %(timeout)s, true)",
+                {"timeout": f"{int(timeout.total_seconds() * 1000)}ms"},
+            )
+            rows = connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+            )
+            slow_query.plan = "\n".join(row[0] for row in rows)
+            connection.rollback()
+    except Exception:
+        logger.exception(f"Could not explain the slow query: {slow_query.statement}")
+    finally:
+        explain_lock.release()
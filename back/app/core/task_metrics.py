@@ -0,0 +1,180 @@
+# pyright: reportUnknownMemberType=false
+"""
+Local metrics of Celery tasks, recorded from Celery signals (independent of logfire):
+- queue latency: time between the publication of a task (or its ETA) and its start
+- runtime
+- number of succeeded and failed executions
+
+Observations are aggregated in memory by each worker process, and added to Redis hashes
+(one per task name) every TASK_METRICS_FLUSH_DELAY, so that all workers contribute to the
+same figures. Durations are stored as (non-cumulative) histograms with fixed buckets.
+"""
+
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any
+
+from celery import Task, signals, states  # type: ignore
+from loguru import logger
+from pydantic import Field
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.schemas.base import MySchema
+
+settings = get_settings()
+
+# Upper bounds of histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+SENT_AT_HEADER = "sent_at"
+
+
+def bucket_label(value: float) -> str:
+    """Label of the smallest bucket holding the value, e.g. '0.25' or 'inf'."""
+    return next(str(bound) for bound in BUCKETS if value <= bound)
+
+
+class TaskMetricsOut(MySchema):
+    name: str
+    succeeded: int = 0
+    failed: int = 0
+    runtime_sum: float = Field(default=0, description="In seconds")
+    runtime_buckets: dict[str, int] = Field(default={}, description="Bound -> count")
+    queue_latency_count: int = 0
+    queue_latency_sum: float = Field(default=0, description="In seconds")
+    queue_latency_buckets: dict[str, int] = Field(
+        default={}, description="Bound -> count"
+    )
+
+
+class TaskMetricsRecorder:
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self.started: dict[str, float] = {}  # task id -> start time (perf counter)
+        # task name -> field -> increment, waiting to be flushed
+        self.pending: defaultdict[str, defaultdict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.last_flush = time.monotonic()
+
+    @staticmethod
+    def key(name: str) -> str:
+        return f"{settings.TASK_METRICS_PREFIX}{name}"
+
+    @staticmethod
+    def names_key() -> str:
+        return f"{settings.TASK_METRICS_PREFIX}names"
+
+    def on_start(self, task_id: str, name: str, sent_at: float | None) -> None:
+        self.started[task_id] = time.perf_counter()
+        if sent_at is not None:
+            latency = max(time.time() - sent_at, 0)
+            fields = self.pending[name]
+            fields["queue_latency_count"] += 1
+            fields["queue_latency_sum"] += latency
+            fields[f"queue_latency:{bucket_label(latency)}"] += 1
+
+    def on_end(self, task_id: str, name: str, state: str) -> None:
+        start = self.started.pop(task_id, None)
+        fields = self.pending[name]
+        if state == states.SUCCESS:
+            fields["succeeded"] += 1
+        if start is not None:
+            runtime = time.perf_counter() - start
+            fields["runtime_sum"] += runtime
+            fields[f"runtime:{bucket_label(runtime)}"] += 1
+
+        flush_delay = settings.TASK_METRICS_FLUSH_DELAY.total_seconds()
+        if time.monotonic() - self.last_flush >= flush_delay:
+            self.flush()
+
+    def on_failure(self, name: str) -> None:
+        self.pending[name]["failed"] += 1
+
+    def flush(self) -> None:
+        """Add pending observations to Redis, in a single round trip."""
+
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, defaultdict(lambda: defaultdict(float))
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.sadd(self.names_key(), *pending)
+                for name, fields in pending.items():
+                    for field, increment in fields.items():
+                        if field.endswith("_sum"):
+                            pipe.hincrbyfloat(self.key(name), field, increment)
+                        else:
+                            pipe.hincrby(self.key(name), field, int(increment))
+                pipe.execute()
+        except RedisError as e:
+            # Metrics must never break tasks: these observations are lost
+            logger.warning(f"Unable to flush task metrics: {e}")
+
+    def read(self) -> list[TaskMetricsOut]:
+        """Aggregated metrics of all task names, from all workers."""
+
+        names = sorted(self.redis.smembers(self.names_key()))  # type: ignore
+        with self.redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.hgetall(self.key(name))
+            hashes: list[dict[str, str]] = pipe.execute()
+
+        metrics: list[TaskMetricsOut] = []
+        for name, fields in zip(names, hashes, strict=True):
+            values: dict[str, Any] = {"runtime_buckets": {}, "queue_latency_buckets": {}}
+            for field, value in fields.items():
+                if ":" in field:
+                    histogram, bound = field.split(":", 1)
+                    values[f"{histogram}_buckets"][bound] = int(value)
+                else:
+                    values[field] = float(value) if field.endswith("_sum") else int(value)
+            metrics.append(TaskMetricsOut(name=name, **values))
+        return metrics
+
+
+recorder = TaskMetricsRecorder(
+    redis=Redis.from_url(url=settings.REDIS_URI, decode_responses=True)
+)
+
+
+##########################################################################################
+# Celery signals
+# https://docs.celeryq.dev/en/stable/userguide/signals.html#task-signals
+##########################################################################################
+
+
+@signals.before_task_publish.connect
+def add_sent_at_header(headers: dict[str, Any], **_: Any) -> None:
+    # An ETA is not queue latency: the task is not supposed to start before
+    eta = headers.get("eta")
+    eta_timestamp = datetime.fromisoformat(eta).timestamp() if eta else 0
+    headers[SENT_AT_HEADER] = max(eta_timestamp, time.time())
+
+
+@signals.task_prerun.connect
+def record_task_start(task_id: str, task: Task, **_: Any) -> None:
+    # Custom headers are top-level on workers, but nested for eager executions
+    sent_at = getattr(task.request, SENT_AT_HEADER, None) or (
+        task.request.headers or {}
+    ).get(SENT_AT_HEADER)
+    recorder.on_start(task_id, task.name, sent_at)
+
+
+@signals.task_failure.connect
+def record_task_failure(sender: Task, **_: Any) -> None:
+    recorder.on_failure(sender.name)
+
+
+@signals.task_postrun.connect
+def record_task_end(task_id: str, task: Task, state: str, **_: Any) -> None:
+    recorder.on_end(task_id, task.name, state)
+
+
+@signals.worker_process_shutdown.connect
+def flush_task_metrics(**_: Any) -> None:
+    recorder.flush()
@@ -0,0 +1,35 @@
+from datetime import UTC, datetime
+
+from celery.backends.database import DatabaseBackend, session_cleanup  # type: ignore
+from loguru import logger
+from sqlalchemy import delete, select
+
+
+def delete_expired_results(backend: DatabaseBackend, batch_size: int) -> int:
+    """
+    Delete task and group results older than `result_expires`, and return their number.
+    Unlike Celery's `backend_cleanup` (a single DELETE), rows are deleted by batches,
+    each one in its own transaction, so that locks and WAL bursts stay small.
+    """
+
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - backend.expires
+    count = 0
+    session = backend.ResultSession()
+    with session_cleanup(session):
+        for model in (backend.task_cls, backend.taskset_cls):
+            table = model.__table__
+            while True:
+                batch = (
+                    select(table.c.id)
+                    .where(table.c.date_done < cutoff)
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                deleted = session.execute(delete(table).where(table.c.id.in_(batch)))
+                session.commit()
+                count += deleted.rowcount
+                if deleted.rowcount < batch_size:
+                    break
+
+    logger.info(f"Deleted {count} expired task results.")
+    return count
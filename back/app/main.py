@@ -1,12 +1,13 @@
 from pathlib import Path
 
-import logfire
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from loguru import logger
 
+from app.core import http_cache  # noqa: F401 - invalidates cached responses on commit
+from app.core import slow_queries  # noqa: F401 - records slow statements
+from app.core.api_metrics import MetricsMiddleware, recorder
+from app.core.compression import CompressionMiddleware, PrecompressedStaticFiles
 from app.core.config import get_settings
 from app.core.exceptions import (
     ProjectAPIException,
@@ -14,6 +15,9 @@ from app.core.exceptions import (
     project_api_exception_handler,
     validation_exception_handler,
 )
+from app.core.logging import configure_logfire
+from app.core.profiling import ProfilingMiddleware
+from app.core.query_metrics import QueryMetricsMiddleware
 from app.utils.introspection import import_package_modules
 
 settings = get_settings()
@@ -38,8 +42,9 @@ app = FastAPI(
 )
 
 if settings.USE_LOGFIRE:
-    logfire.configure(token=settings.LOGFIRE_TOKEN)
-    logger.configure(handlers=[logfire.loguru_handler()])
+    import logfire
+
+    configure_logfire()
     logfire.instrument_fastapi(app)
 
 
@@ -51,14 +56,32 @@ app.add_middleware(
     allow_methods=settings.CORS_ALLOW_METHODS,
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryMetricsMiddleware)
+if settings.API_METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)  # last, to profile other middlewares too
 
 # Detect and include all routers dynamically from the given module
-for module in import_package_modules("app.routes"):
+# (disabled routes, and their dependencies, are not even imported)
+enabled_routes = {
+    "app.routes.debug": settings.DEBUG_ROUTES_ENABLED,
+    "app.routes.metrics": settings.API_METRICS_ENABLED,
+}
+for module in import_package_modules(
+    "app.routes",
+    exclude=tuple(name for name, enabled in enabled_routes.items() if not enabled),
+):
     app.include_router(module.router)
 
+recorder.bind_routes(app.routes)  # metrics of each route, ready for first requests
+
 
 app.mount(
     "/public/",
-    StaticFiles(directory=Path(__file__).resolve().parent.parent / "public"),
+    PrecompressedStaticFiles(
+        directory=Path(__file__).resolve().parent.parent / "public",
+        max_age=int(settings.STATIC_FILES_MAX_AGE.total_seconds()),
+    ),
     name="public",
 )
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Index, func, select, text, tuple_, update
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 
+from app.core.config import get_settings
 from app.models.base import (
     DeactivateModel,
     ExpireModel,
@@ -17,7 +20,69 @@ from app.utils.strings import SecretId
 if TYPE_CHECKING:
     from app.models.user import User
 
+settings = get_settings()
+
 
 class Badge(SecretIdModel, TimeStampModel, ExpireModel, DeactivateModel, MyModel):
+    __table_args__ = (
+        # Only active badges can expire: this keeps the index small (cf. sweep_expired)
+        Index(
+            "ix_badge_expire_at_id_active",
+            "expire_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_badge_expire_at", "expire_at"),  # cf. ExpireModel.filter_expired
+    )
+
     owner_id: Mapped[SecretId] = mapped_column(ForeignKey("tb_user.id"))
     owner: Mapped[User] = relationship(back_populates="badges", lazy="selectin")
+
+    @classmethod
+    def sweep_expired(
+        cls,
+        session: Session,
+        chunk_size: int = settings.BADGE_SWEEP_CHUNK_SIZE,
+        on_expired: Callable[[list[SecretId]], None] | None = None,
+    ) -> int:
+        """
+        Deactivate active badges that expired, ordered by (expire_at, id), and return
+        their number.
+        Badges are processed by chunks: each one is committed, so that only its rows are
+        locked. Deactivated badges leave the `is_active` filter, so an interrupted sweep
+        resumes by itself on the next run. `on_expired` is called with the ids of each
+        committed chunk.
+        """
+
+        until = session.execute(select(func.now())).scalar_one()  # bounds this sweep
+        last: tuple[datetime, SecretId] | None = None  # keyset of the previous chunk
+        count = 0
+
+        while True:
+            stmt = select(cls.id, cls.expire_at).where(
+                cls.is_active, cls.expire_at <= until
+            )
+            if last is not None:
+                stmt = stmt.where(tuple_(cls.expire_at, cls.id) > tuple_(*last))
+            stmt = stmt.order_by(cls.expire_at, cls.id).limit(chunk_size)
+            rows = session.execute(stmt).all()
+            if not rows:
+                break
+
+            ids = [row.id for row in rows]
+            session.execute(
+                update(cls)
+                .where(cls.id.in_(ids), cls.is_active)  # may have changed meanwhile
+                .values(is_active=False)
+                .execution_options(synchronize_session=False)
+            )
+            last = rows[-1].expire_at, ids[-1]
+            session.commit()
+
+            count += len(ids)
+            if on_expired:
+                on_expired(ids)
+            if len(rows) < chunk_size:
+                break
+
+        return count
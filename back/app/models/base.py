@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Any, Literal, Self
 
 from pydantic.alias_generators import to_snake
-from sqlalchemy import Select, and_, func, select
+from sqlalchemy import ColumnElement, DateTime, Select, and_, func, or_, select
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import (
@@ -15,6 +15,7 @@ from sqlalchemy.orm import (
 
 from app.schemas.base import MySchema
 from app.utils.strings import SecretId, get_secret_id
+from app.utils.timezone import now_utc
 
 
 class Base(DeclarativeBase):
@@ -177,16 +178,21 @@ class SingletonModel(MyModel):
 class TimeStampModel(MyModel):
     __abstract__ = True
 
-    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    # Stored as `timestamptz`: values are read as aware datetimes (in UTC, cf. engine)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # `onupdate` (instead of `server_onupdate`, which only declares a DB trigger) makes
+    # the ORM actually refresh the value in each UPDATE statement.
     modified_at: Mapped[datetime] = mapped_column(
-        server_default=func.now(), server_onupdate=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
 
 class ExpireModel(MyModel):
     __abstract__ = True
 
-    expire_at: Mapped[datetime | None]
+    expire_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     # The expired property below can be used in both Python logic and SQLAlchemy queries.
     # However, since the SQL expression requires its own implementation, there is no
@@ -194,13 +200,24 @@ class ExpireModel(MyModel):
 
     @hybrid_property
     def expired(self) -> bool:  # type: ignore
-        return self.expire_at is not None and datetime.now() > self.expire_at
+        return self.expire_at is not None and now_utc() > self.expire_at
 
     @expired.expression
     @classmethod
     def expired(cls):
         return and_(cls.expire_at.isnot(None), func.now() > cls.expire_at)
 
+    @classmethod
+    def filter_expired(cls, expired: bool) -> ColumnElement[bool]:
+        """
+        Same as `cls.expired` / `~cls.expired` in a WHERE clause, but written as plain
+        comparisons on `expire_at`, so that an index on this column can be used.
+        NOTE: `now()` is the transaction start time, i.e. a single "now" per request.
+        """
+        if expired:
+            return cls.expire_at < func.now()
+        return or_(cls.expire_at.is_(None), cls.expire_at >= func.now())
+
 
 class DeactivateModel(MyModel):
     __abstract__ = True
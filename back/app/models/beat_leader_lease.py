@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Mapped, Session
+
+from app.models.base import MyModel, SingletonModel
+
+
+class BeatLeaderLease(SingletonModel, MyModel):
+    """
+    Lease allowing a single beat process to dispatch tasks, while other replicas wait
+    (cf. MyDatabaseScheduler). The lease must be renewed before `expire_at`, otherwise
+    any other replica can take it over.
+    Database time is used everywhere, so that replicas clocks do not matter.
+    """
+
+    holder: Mapped[str | None]
+    expire_at: Mapped[datetime | None]
+
+    @classmethod
+    def acquire(cls, holder: str, duration: timedelta, session: Session) -> bool:
+        """
+        Acquire the lease (or renew it if it's already held by `holder`).
+        Return True if `holder` is the leader until the lease duration is over.
+        """
+
+        # Make sure the singleton exists, without race condition between replicas
+        session.execute(insert(cls).values(id=1).on_conflict_do_nothing())
+
+        # Atomic compare-and-set: only one replica can match the WHERE clause
+        stmt = (
+            update(cls)
+            .where(
+                cls.id == 1,
+                or_(
+                    cls.holder == holder,
+                    cls.holder.is_(None),
+                    cls.expire_at < func.now(),
+                ),
+            )
+            .values(holder=holder, expire_at=func.now() + duration)
+            .execution_options(synchronize_session=False)
+        )
+        acquired = session.execute(stmt).rowcount == 1
+        session.commit()
+        return acquired
+
+    @classmethod
+    def release(cls, holder: str, session: Session) -> None:
+        """Give up the lease (if held by `holder`), so that another replica takes over."""
+
+        stmt = (
+            update(cls)
+            .where(cls.id == 1, cls.holder == holder)
+            .values(holder=None, expire_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        session.execute(stmt)
+        session.commit()
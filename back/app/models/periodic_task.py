@@ -1,12 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from enum import StrEnum
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, event
 from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, Mapper, mapped_column, validates
 
 from app.models.base import DeactivateModel, MyModel, SecretIdModel, TimeStampModel
+from app.utils.crontab import parse_crontab_expression
+from app.utils.timezone import now_utc
+
+if TYPE_CHECKING:
+    from celery.schedules import schedule  # type: ignore
 
 
 class ScheduleType(StrEnum):
@@ -39,6 +44,22 @@ class PeriodicTask(SecretIdModel, TimeStampModel, DeactivateModel, MyModel):
         doc="The crontab expression for scheduling tasks, e.g., '0 12 * * *' (optional).",
     )
 
+    crontab_fields: Mapped[dict[str, str] | None] = mapped_column(
+        JSON,
+        default=None,
+        doc="The parsed crontab expression, as Celery's crontab arguments.",
+    )
+
+    @validates("crontab_expression")
+    def validate_crontab_expression(self, _: str, value: str | None) -> str | None:
+        """Parse the expression once, when it is set: invalid ones never reach beat."""
+
+        if value is None:
+            self.crontab_fields = None
+            return None
+        self.crontab_fields = parse_crontab_expression(value)  # can raise ValueError
+        return " ".join(self.crontab_fields.values())  # normalized
+
     @property
     def schedule_type(self) -> ScheduleType:
         if self.interval is not None:
@@ -47,6 +68,19 @@ class PeriodicTask(SecretIdModel, TimeStampModel, DeactivateModel, MyModel):
             return ScheduleType.CRONTAB
         raise ValueError("Invalid schedule type")
 
+    @property
+    def celery_schedule(self) -> "schedule":
+        """The Celery schedule of the task, in the timezone of the Celery app."""
+
+        # (imported here, not to load Celery and its configuration with the models)
+        from celery.schedules import crontab, schedule  # type: ignore
+
+        from app.confcelery import celery_app
+
+        if self.schedule_type == ScheduleType.INTERVAL:
+            return schedule(run_every=self.interval, app=celery_app)
+        return crontab(**self.crontab_fields, app=celery_app)  # type: ignore
+
     args: Mapped[list[Any]] = mapped_column(
         JSON,
         doc="JSON-encoded positional arguments for the task, e.g., ['arg1', 'arg2'].",
@@ -60,3 +94,42 @@ class PeriodicTask(SecretIdModel, TimeStampModel, DeactivateModel, MyModel):
     start_at: Mapped[datetime | None] = mapped_column(
         doc="The datetime when the schedule should begin triggering the task (optional).",
     )
+
+    # Run state, written back by the beat scheduler (cf. MyDatabaseScheduler.sync)
+
+    last_run_at: Mapped[datetime | None] = mapped_column(
+        default=None,
+        doc="The (UTC) datetime when the task was last sent by beat.",
+    )
+
+    total_run_count: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+        doc="The number of times the task has been sent by beat.",
+    )
+
+    next_run_at: Mapped[datetime | None] = mapped_column(
+        default=None,
+        doc="The (UTC) datetime when beat should send the task next.",
+    )
+
+    def compute_next_run_at(self) -> datetime:
+        """Return when beat should send the task next, based on its run state."""
+
+        celery_schedule = self.celery_schedule
+        now = now_utc()
+        celery_schedule.nowfun = lambda: now  # same "now" as below, for exact results
+        # Like beat, consider a task never sent as just sent
+        last_run_at = self.last_run_at.replace(tzinfo=UTC) if self.last_run_at else now
+        remaining = celery_schedule.remaining_estimate(
+            last_run_at.astimezone(celery_schedule.tz)
+        )
+        return (now + max(remaining, timedelta(0))).replace(tzinfo=None)
+
+
+@event.listens_for(PeriodicTask, "before_insert")
+@event.listens_for(PeriodicTask, "before_update")
+def set_next_run_at(_: Mapper[PeriodicTask], __: Any, target: PeriodicTask) -> None:
+    """Precompute the next run, so that beat can build its heap without computing it."""
+
+    target.next_run_at = target.compute_next_run_at()
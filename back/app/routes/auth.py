@@ -14,6 +14,7 @@ from app.core.exceptions import (
     UserCanNotResetPassword,
     UserDoesNotExist,
 )
+from app.core.http_cache import http_cache
 from app.core.security import get_password_hash
 from app.models.user import User
 from app.schemas.message import Message
@@ -43,6 +44,7 @@ def access_token(
 
 
 @router.get("/me", response_model=UserPublic)
+@http_cache(User, schema=UserPublic, vary_on_auth=True)
 def me(current_user: CurrentUserDep):
     return current_user
 
@@ -1,12 +1,15 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from app.core.database import SessionDep
 from app.core.exceptions import BadgeOwnerDoesNotExist, ItemNotFound
+from app.core.http_cache import http_cache
+from app.core.query_export import ExportDep
 from app.core.query_ordering import Orderer, get_orderer_dep
 from app.core.query_pagination import Page, PaginationDep
+from app.core.query_projection import project
 from app.core.query_searching import Searcher, get_searcher_dep
 from app.models.badge import Badge
 from app.models.user import User
@@ -17,6 +20,7 @@ router = APIRouter(prefix="/badges", tags=["Badges"])
 
 
 @router.get("", summary="Read all badges", response_model=Page[BadgeOut])
+@http_cache(Badge, User)
 def read_badges(
     session: SessionDep,
     paginator: PaginationDep,
@@ -25,13 +29,43 @@ def read_badges(
         Depends(get_searcher_dep(Badge, ["id", "owner__first_name", "owner__last_name"])),
     ],
     orderer: Annotated[Orderer, Depends(get_orderer_dep(Badge))],
+    expired: Annotated[
+        bool | None, Query(description="Only return (non) expired badges")
+    ] = None,
 ):
-    query = orderer.sort(select(Badge))  # separation of concerns?
+    query = orderer.sort(project(Badge, BadgeOut))  # separation of concerns?
     query = searcher.make_search(query)
-    return paginator.paginate(query, BadgeOut, session)
+    if expired is not None:
+        query = query.where(Badge.filter_expired(expired))
+    return paginator.paginate_response(query, BadgeOut, session)
+
+
+@router.get(
+    "/export",
+    summary="Export all badges",
+    response_class=StreamingResponse,
+    response_description="All badges, as NDJSON or CSV",
+)
+def export_badges(
+    exporter: ExportDep,
+    searcher: Annotated[
+        Searcher,
+        Depends(get_searcher_dep(Badge, ["id", "owner__first_name", "owner__last_name"])),
+    ],
+    orderer: Annotated[Orderer, Depends(get_orderer_dep(Badge))],
+    expired: Annotated[
+        bool | None, Query(description="Only return (non) expired badges")
+    ] = None,
+):
+    query = orderer.sort(project(Badge, BadgeOut))
+    query = searcher.make_search(query)
+    if expired is not None:
+        query = query.where(Badge.filter_expired(expired))
+    return exporter.export(query, BadgeOut, filename="badges")
 
 
 @router.get("/{badge_id}", summary="Read a given badge", response_model=BadgeOut)
+@http_cache(Badge, User, schema=BadgeOut)
 def read_badge(badge_id: SecretId, session: SessionDep):
     badge = Badge.get_by_id(badge_id, session, exc=ItemNotFound())
     return badge
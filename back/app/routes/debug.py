@@ -1,20 +1,27 @@
 from time import sleep
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import boto3
-from botocore.exceptions import BotoCoreError, ClientError
 from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile
-from mypy_boto3_s3 import S3Client
+from fastapi.responses import FileResponse
 
 from app.core.auth import get_current_superuser
 from app.core.config import Settings, SettingsDep, get_settings
+from app.core.database import SessionDep
 from app.core.exceptions import ErrorPayload
+from app.core.http_cache import http_cache
+from app.core.profiling import ProfileOut, get_profile_path, list_profiles
 from app.core.query_pagination import Page, Pagination
-from app.models.db_parameters import DBParametersDep
+from app.core.slow_queries import SlowQueryOut, read_slow_queries
+from app.core.task_metrics import TaskMetricsOut, recorder
+from app.models.db_parameters import DBParameters
 from app.schemas.message import Message
 from app.utils.orm import model_to_dict
+from app.websockets.schemas.badges import WSBadgesExpiredMessage
 from app.websockets.schemas.chat import WSChatMessage
 
+if TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
 settings = get_settings()
 router = APIRouter(prefix="/debug", tags=["Debug"])
 
@@ -34,12 +41,18 @@ def read_settings(settings: SettingsDep):
     summary="Read database parameters",
     response_model=dict[str, Any],
 )
-def read_db_parameters(db_parameters: DBParametersDep):
-    return model_to_dict(db_parameters)
+@http_cache(DBParameters, schema=dict[str, Any])
+def read_db_parameters(session: SessionDep):
+    # loaded here rather than with DBParametersDep, to skip the query on cache hits
+    return model_to_dict(DBParameters.load(session))
 
 
 @router.post("/upload")
 def upload_files(files: list[UploadFile]) -> dict[str, Any]:
+    # boto3 takes a while to import, and is only needed here
+    import boto3
+    from botocore.exceptions import BotoCoreError, ClientError
+
     uploaded_files: list[dict[str, Any]] = []
 
     s3_client: S3Client = boto3.client(  # type: ignore
@@ -92,7 +105,56 @@ def some_method_with_celery_task_inside() -> str:  # no need to be async
 
 
 @router.get(
-    "/schema-includer", response_model=Pagination | Page | ErrorPayload | WSChatMessage
+    "/task-metrics",
+    summary="Read metrics of Celery tasks (all workers)",
+    dependencies=[Depends(get_current_superuser)],
+    response_model=list[TaskMetricsOut],
+)
+def read_task_metrics() -> list[TaskMetricsOut]:
+    """Figures are cumulative since the first execution: compare 2 reads to get rates."""
+    return recorder.read()
+
+
+@router.get(
+    "/profiles",
+    summary="List request profiles (written by this server)",
+    dependencies=[Depends(get_current_superuser)],
+    response_model=list[ProfileOut],
+)
+def read_profiles() -> list[ProfileOut]:
+    """Profiles written by ProfilingMiddleware, the latest first."""
+    return list_profiles()
+
+
+@router.get(
+    "/profiles/{name}",
+    summary="Download a request profile",
+    dependencies=[Depends(get_current_superuser)],
+    response_class=FileResponse,
+)
+def read_profile(name: str) -> FileResponse:
+    """Collapsed stacks, to be opened with https://www.speedscope.app or flamegraph.pl"""
+    return FileResponse(get_profile_path(name), media_type="text/plain", filename=name)
+
+
+@router.get(
+    "/slow-queries",
+    summary="Read the latest slow queries (this worker only)",
+    dependencies=[Depends(get_current_superuser)],
+    response_model=list[SlowQueryOut],
+)
+def read_slow_queries_log() -> list[SlowQueryOut]:
+    """Statements slower than SLOW_QUERY_THRESHOLD, the latest first, with sampled plans."""
+    return read_slow_queries()
+
+
+@router.get(
+    "/schema-includer",
+    response_model=Pagination
+    | Page
+    | ErrorPayload
+    | WSChatMessage
+    | WSBadgesExpiredMessage,
 )
 def schema_includer() -> None:
     """This is a fake endpoint to force some useful schemas to be included in openAPI"""
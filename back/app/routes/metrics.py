@@ -0,0 +1,45 @@
+from secrets import compare_digest
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import PlainTextResponse
+from fastapi.security.utils import get_authorization_scheme_param
+from loguru import logger
+from redis.exceptions import RedisError
+
+from app.core.api_metrics import recorder
+from app.core.config import get_settings
+from app.core.exceptions import InvalidToken, ServiceUnavailable
+
+settings = get_settings()
+
+
+def check_metrics_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    """Require `Authorization: Bearer <API_METRICS_TOKEN>`, if this setting is set."""
+
+    if settings.API_METRICS_TOKEN is None:
+        return
+    scheme, token = get_authorization_scheme_param(authorization)
+    if scheme.lower() != "bearer" or not compare_digest(
+        token, settings.API_METRICS_TOKEN
+    ):
+        raise InvalidToken()
+
+
+router = APIRouter(tags=["Metrics"], dependencies=[Depends(check_metrics_token)])
+
+
+@router.get(
+    "/metrics",
+    summary="Read metrics of the API, for Prometheus",
+    response_class=PlainTextResponse,
+)
+async def read_metrics() -> PlainTextResponse:
+    """Metrics of all workers. Figures of this worker are flushed first."""
+    await recorder.flush()
+    try:
+        metrics = await recorder.render()
+    except RedisError as e:
+        logger.error(f"Unable to read API metrics: {e}")
+        raise ServiceUnavailable() from e
+    return PlainTextResponse(metrics, media_type="text/plain; version=0.0.4")
@@ -1,11 +1,13 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi.responses import StreamingResponse
 
 from app.core.database import SessionDep
 from app.core.exceptions import EmailAlreadyExists
+from app.core.query_export import ExportDep
 from app.core.query_pagination import Page, PaginationDep
+from app.core.query_projection import project
 from app.core.query_searching import Searcher, get_searcher_dep
 from app.models.user import User
 from app.schemas.message import Message
@@ -27,8 +29,25 @@ def read_users(
         Depends(get_searcher_dep(User, ["first_name", "last_name"])),
     ],
 ):
-    query = searcher.make_search(select(User))  # separation of concerns?
-    return paginator.paginate(query, BadgeOwner, session)
+    query = searcher.make_search(project(User, BadgeOwner))  # separation of concerns?
+    return paginator.paginate_response(query, BadgeOwner, session)
+
+
+@router.get(
+    "/export",
+    summary="Export all users",
+    response_class=StreamingResponse,
+    response_description="All users, as NDJSON or CSV",
+)
+def export_users(
+    exporter: ExportDep,
+    searcher: Annotated[
+        Searcher,
+        Depends(get_searcher_dep(User, ["first_name", "last_name"])),
+    ],
+):
+    query = searcher.make_search(project(User, BadgeOwner))
+    return exporter.export(query, BadgeOwner, filename="users")
 
 
 @router.post(
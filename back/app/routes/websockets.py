@@ -6,11 +6,16 @@ from typing import Any
 
 from fastapi import APIRouter, FastAPI, WebSocket, status
 from loguru import logger
+from redis.exceptions import RedisError
 
 from app.core.config import get_settings
+from app.core.exceptions import ItemNotFound, ServiceUnavailable
 from app.websockets.connection import handle_websocket_connection
+from app.websockets.handlers.badges import handle_badges_message
 from app.websockets.handlers.chat import handle_chat_message
+from app.websockets.presence import presence, presence_flusher
 from app.websockets.redis_subscriber import redis_subscriber
+from app.websockets.schemas.presence import WSPresenceMessage
 
 settings = get_settings()
 
@@ -18,15 +23,18 @@ settings = get_settings()
 # Registry of supported rooms and their associated message handlers
 SUPPORTED_ROOMS: dict[str, Callable[[dict[str, Any], WebSocket], Awaitable[None]]] = {
     "chat": handle_chat_message,
+    "badges": handle_badges_message,
     # add more handlers here ...
 }
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    """Start the Redis subscriber in background on startup"""
+    """Start the Redis subscriber and presence flusher in background on startup"""
     asyncio.create_task(redis_subscriber())
+    asyncio.create_task(presence_flusher())
     yield
+    await presence.clear()
 
 
 router = APIRouter(prefix="/ws", tags=["WebSockets"], lifespan=lifespan)
@@ -47,3 +55,20 @@ async def websocket_room(room: str, websocket: WebSocket) -> None:
         await handle_websocket_connection(
             websocket=websocket, room=room, on_message=handler
         )
+
+
+@router.get(
+    "/room/{room}/presence",
+    summary="Read the number of connected clients in a room",
+    response_model=WSPresenceMessage,
+)
+async def read_room_presence(room: str) -> WSPresenceMessage:
+    """Occupancy is cluster-wide, and can lag behind by REDIS_PRESENCE_FLUSH_DELAY."""
+    if room not in SUPPORTED_ROOMS:
+        raise ItemNotFound()
+    try:
+        occupancy = await presence.occupancy(room)
+    except RedisError as e:
+        logger.error(f"Unable to read presence of room '{room}': {e}")
+        raise ServiceUnavailable() from e
+    return WSPresenceMessage(room=room, occupancy=occupancy)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 
 import phonenumbers
 from pydantic import (
@@ -6,16 +7,18 @@ from pydantic import (
     ConfigDict,
     Field,
     field_serializer,
-    field_validator,
 )
 from pydantic.alias_generators import to_camel
 from pydantic_extra_types.phone_numbers import PhoneNumber
 
 from app.core.config import get_settings
-from app.utils.timezone import make_aware
+from app.utils.timezone import to_local
 
 settings = get_settings()
 
+# One-time setup: numbers written without international prefix use the app region
+PhoneNumber.default_region_code = settings.PHONE_REGION_CODE
+
 
 class MySchema(BaseModel):
     """Allow to add a custom global config for all schemas."""
@@ -37,14 +40,23 @@ class MySchema(BaseModel):
 ##########################################################################################
 
 
+@lru_cache(maxsize=settings.PHONE_FORMAT_CACHE_SIZE)
+def format_phone_number(value: str) -> str:
+    """
+    National format of a stored phone number (e.g. `tel:+33-6-11-22-33-44`).
+    Parsing is comparatively expensive and the same numbers are serialized again and
+    again (e.g. on each page of users), hence the bounded cache.
+    """
+    parsed_number = phonenumbers.parse(value, settings.PHONE_REGION_CODE)
+    return phonenumbers.format_number(
+        parsed_number, phonenumbers.PhoneNumberFormat.NATIONAL
+    )
+
+
 class PhoneNumberSchemaIn(MySchema):
+    # normalized once on write (cf. `PhoneNumber.default_region_code` above)
     phone_number: PhoneNumber | None = Field(default=None)
 
-    @field_validator("phone_number", mode="before")
-    def configure_default_region(cls, value: PhoneNumber | None):
-        PhoneNumber.default_region_code = settings.PHONE_REGION_CODE
-        return value
-
 
 class PhoneNumberSchemaOut(MySchema):  # TODO: add "Opt" in name or make mandatory
     phone_number: PhoneNumber | None
@@ -58,11 +70,7 @@ class PhoneNumberSchemaOut(MySchema):  # TODO: add "Opt" in name or make mandato
         and that all recorded phone numbers used the same input and output regions.
         """
         if value:
-            region_code = settings.PHONE_REGION_CODE
-            parsed_number = phonenumbers.parse(value, region_code)
-            return phonenumbers.format_number(
-                parsed_number, phonenumbers.PhoneNumberFormat.NATIONAL
-            )
+            return format_phone_number(value)
 
 
 class TimeStampSchemaOut(MySchema):
@@ -71,7 +79,7 @@ class TimeStampSchemaOut(MySchema):
 
     @field_serializer("created_at", "modified_at", when_used="json")
     def timestampable_tz_aware_datefield(self, value: datetime) -> datetime:
-        return make_aware(value)
+        return to_local(value)
 
 
 class ExpireSchemaOptIn(MySchema):
@@ -89,7 +97,7 @@ class ExpireSchemaOut(MySchema):
     @field_serializer("expire_at", when_used="json")
     def expirable_tz_aware_datefield(self, value: datetime | None) -> datetime | None:
         if value:
-            return make_aware(value)
+            return to_local(value)
         return None
 
 
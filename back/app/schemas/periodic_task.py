@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 from typing import Any
 
-from pydantic import Field
+from pydantic import Field, field_validator
 
 from app.schemas.base import DeactivateSchemaOptIn, MySchema
+from app.utils.crontab import parse_crontab_expression
 
 
 class PeriodicTaskIn(DeactivateSchemaOptIn, MySchema):
@@ -15,5 +16,11 @@ class PeriodicTaskIn(DeactivateSchemaOptIn, MySchema):
     kwargs: dict[str, Any] = Field(default={})
     start_at: datetime | None = Field(default=None)
 
+    @field_validator("crontab_expression", mode="after")
+    def validate_crontab_expression(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        return " ".join(parse_crontab_expression(value).values())
+
     # NOTE: there is no interval VS crontab_expression integrity check since there is
     # a strong constraint DB that will be checked anyway.
@@ -1,9 +1,53 @@
 import time
 
+from celery.backends.database import DatabaseBackend  # type: ignore
+from redis import Redis
+from sqlalchemy.orm import Session
+
 from app.confcelery import celery_app
+from app.core.batching import BatchItem, BatchTask
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.task_results import delete_expired_results
+from app.models.badge import Badge
+from app.utils.strings import SecretId
+from app.websockets.schemas.badges import WSBadgesExpiredMessage
+
+settings = get_settings()
 
 
 @celery_app.task  # type: ignore
 def add(a: int, b: int) -> int:
     time.sleep(1)
     return a + b
+
+
+# Results are stored per item by BatchTask itself
+@celery_app.task(base=BatchTask, flush_every=100, ignore_result=True)  # type: ignore
+def add_many(items: list[BatchItem]) -> list[int]:
+    """Batching version of `add`: `add_many.delay(3, 4)` returns a BatchItemResult."""
+    return [item.args[0] + item.args[1] for item in items]
+
+
+@celery_app.task(ignore_result=True)  # type: ignore
+def sweep_expired_badges() -> int:
+    """Deactivate newly expired badges, and notify clients of the 'badges' room."""
+
+    redis = Redis.from_url(url=settings.REDIS_URI, decode_responses=True)
+
+    def publish(badge_ids: list[SecretId]) -> None:
+        message = WSBadgesExpiredMessage(badge_ids=badge_ids)
+        redis.publish(f"{settings.REDIS_CHANNEL_PREFIX}badges", message.model_dump_json())
+
+    with Session(engine) as session, redis:
+        return Badge.sweep_expired(session, on_expired=publish)
+
+
+@celery_app.task(ignore_result=True)  # type: ignore
+def cleanup_task_results() -> int:
+    """Delete expired task results, when they are stored in the database."""
+
+    backend = celery_app.backend
+    if not isinstance(backend, DatabaseBackend):
+        return 0  # e.g. Redis, where results expire by themselves
+    return delete_expired_results(backend, settings.TASK_RESULT_CLEANUP_BATCH_SIZE)
@@ -0,0 +1,119 @@
+import re
+
+import fakeredis
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+
+from app.core import api_metrics
+from app.core.api_metrics import RouteMetrics, recorder, render_requests
+from app.routes import metrics as metrics_routes
+from app.websockets.redis_subscriber import manager, subscriber_stats
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        recorder, "redis", fakeredis.FakeAsyncRedis(decode_responses=True)
+    )
+    for route_metrics in recorder.routes.values():
+        route_metrics.pop()  # observations of other tests
+    recorder.flushed_reconnects = subscriber_stats.reconnects
+
+
+def sample(metrics: str, name: str) -> float:
+    match = re.search(rf"^{re.escape(name)} (\S+)$", metrics, re.MULTILINE)
+    assert match, f"{name} not found"
+    return float(match.group(1))
+
+
+def test_metrics_endpoint(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    client.get("/badges")
+    client.get("/badges")
+    client.get("/badges/does-not-exist")
+    client.get("/does-not-exist")
+    websocket = object()
+    manager.add("chat", websocket)  # type: ignore
+    monkeypatch.setattr(subscriber_stats, "reconnects", subscriber_stats.reconnects + 2)
+    try:
+        response = client.get("/metrics")
+    finally:
+        manager.remove("chat", websocket)  # type: ignore
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    metrics = response.text
+    route = 'method="GET",route="/badges"'
+    assert sample(metrics, f'http_requests_total{{{route},status="200"}}') == 2
+    assert sample(metrics, f"http_request_duration_seconds_count{{{route}}}") == 2
+    assert (
+        sample(metrics, f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 2
+    )
+    assert sample(metrics, f"http_request_duration_seconds_sum{{{route}}}") > 0
+    # Templates, not paths
+    labels = 'method="GET",route="/badges/{badge_id}",status="404"'
+    assert sample(metrics, f"http_requests_total{{{labels}}}") == 1
+    labels = 'method="GET",route="unmatched",status="404"'
+    assert sample(metrics, f"http_requests_total{{{labels}}}") == 1
+
+    assert sample(metrics, "http_requests_in_flight") == 1  # this one
+    assert sample(metrics, "db_pool_size") == 5
+    assert sample(metrics, "db_pool_checked_out") >= 0
+    assert sample(metrics, 'websocket_connections{room="chat"}') == 1
+    assert sample(metrics, "redis_subscriber_lag_seconds") >= 0
+    assert sample(metrics, "redis_subscriber_reconnects_total") == 2
+
+
+def test_workers_are_aggregated(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    client.get("/health-check")
+    client.get("/metrics")  # flushes
+    monkeypatch.setattr(api_metrics.socket, "gethostname", lambda: "other-host")
+    client.get("/health-check")
+    metrics = client.get("/metrics").text  # flushes, as another worker
+
+    labels = 'method="GET",route="/health-check",status="200"'
+    assert sample(metrics, f"http_requests_total{{{labels}}}") == 2
+    labels = 'method="GET",route="/metrics",status="200"'
+    assert sample(metrics, f"http_requests_total{{{labels}}}") == 1
+    # Gauges are summed: each worker was serving /metrics when flushing
+    assert sample(metrics, "http_requests_in_flight") == 2
+    assert sample(metrics, "db_pool_size") == 10
+
+
+def test_metrics_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(metrics_routes.settings, "API_METRICS_TOKEN", "secret")
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.get("/metrics", headers={"Authorization": "Bearer other"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_metrics_without_redis(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    async def unavailable() -> str:
+        raise ConnectionError("Connection refused")
+
+    monkeypatch.setattr(recorder, "render", unavailable)
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["errors"]["general"]
+
+
+def test_render_requests():
+    route_metrics = RouteMetrics()
+    route_metrics.observe(200, 0.003)
+    route_metrics.observe(200, 0.2)
+    route_metrics.observe(500, 20)
+    fields = {f"GET /items {k}": str(v) for k, v in route_metrics.pop().items()}
+    assert not route_metrics.statuses
+
+    lines = render_requests(fields)
+    labels = 'method="GET",route="/items"'
+    assert f'http_requests_total{{{labels},status="200"}} 2' in lines
+    assert f'http_requests_total{{{labels},status="500"}} 1' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="10"}} 2' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"http_request_duration_seconds_count{{{labels}}} 3" in lines
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from celery import Celery  # type: ignore
+
+from app.core.batching import BatchItem, BatchItemError, BatchTask
+
+
+@pytest.fixture
+def add_many() -> BatchTask:
+    app = Celery("test_app")
+
+    @app.task(base=BatchTask, flush_every=3, shared=False)
+    def add_many(items: list[BatchItem]) -> list[int]:
+        if any(item.kwargs.get("fail") for item in items):
+            raise RuntimeError("boom")
+        return [item.args[0] + item.args[1] for item in items]
+
+    add_many.redis = fakeredis.FakeRedis(decode_responses=True)
+    return add_many
+
+
+def test_batch_task_buffers_calls(add_many: BatchTask):
+    with patch.object(add_many, "apply_async") as apply_async:
+        results = [add_many.delay(i, 1) for i in range(3)]
+        # A delayed flush for the first item, an immediate one when the batch is full
+        assert apply_async.call_count == 2
+        assert apply_async.call_args_list[0].kwargs == {"countdown": 0.5}
+        assert apply_async.call_args_list[1].kwargs == {}
+        assert not results[0].ready()
+
+        # What the worker runs: a single execution for the whole batch
+        assert add_many() == 3
+        assert [result.get(timeout=1) for result in results] == [1, 2, 3]
+        assert add_many() == 0  # nothing left
+
+
+def test_batch_task_reschedules_remaining_items(add_many: BatchTask):
+    with patch.object(add_many, "apply_async") as apply_async:
+        results = [add_many.delay(i, i) for i in range(4)]
+        apply_async.reset_mock()
+
+        assert add_many() == 3
+        apply_async.assert_called_once_with(countdown=0.5)  # for the 4th item
+        assert add_many() == 1
+        assert results[3].get(timeout=1) == 6
+
+
+def test_batch_task_schedules_a_flush_per_batch(add_many: BatchTask):
+    """Flushes are not scheduled for each item once the batch is full."""
+
+    with patch.object(add_many, "apply_async") as apply_async:
+        for i in range(10):
+            add_many.delay(i, i)
+        # A delayed flush for the first item, and an immediate one per full batch
+        assert apply_async.call_count == 4
+        apply_async.reset_mock()
+
+        # An execution leaving items schedules a flush, unless one is already pending
+        assert add_many() == 3
+        add_many.schedule_flush(countdown=timedelta(0))
+        apply_async.assert_called_once_with(countdown=0)
+
+
+def test_batch_task_processes_items_again_when_delivered_again(add_many: BatchTask):
+    with patch.object(add_many, "apply_async"):
+        results = [add_many.delay(i, 1) for i in range(3)]
+        # The worker of this execution died after taking the items
+        add_many.take_items(add_many.processing_key("task-id"))
+        add_many.delay(10, 10)
+
+        add_many.push_request(id="task-id")
+        try:
+            assert add_many() == 3
+        finally:
+            add_many.pop_request()
+        assert [result.get(timeout=1) for result in results] == [1, 2, 3]
+        assert add_many.redis.llen(add_many.buffer_key) == 1
+
+
+def test_batch_task_failure(add_many: BatchTask):
+    with patch.object(add_many, "apply_async"):
+        result = add_many.delay(1, 2, fail=True)
+        with pytest.raises(RuntimeError):
+            add_many()
+        with pytest.raises(BatchItemError):
+            result.get(timeout=1)
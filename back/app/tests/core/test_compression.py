@@ -0,0 +1,101 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.commands.compress_static import compress_file
+from app.core.compression import (
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+    accepted_encodings,
+)
+
+BIG_CONTENT = "body { color: red; }\n" * 100
+
+
+def test_accepted_encodings():
+    headers = Headers({"accept-encoding": "gzip, deflate;q=0.5, br;q=0"})
+    assert accepted_encodings(headers) == {"gzip", "deflate"}
+    assert accepted_encodings(Headers({})) == set()
+
+
+def test_compression_middleware():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big() -> str:
+        return BIG_CONTENT
+
+    @app.get("/small")
+    def small() -> str:
+        return "small"
+
+    client = TestClient(app)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == BIG_CONTENT  # decoded by the client
+    assert int(response.headers["content-length"]) < len(BIG_CONTENT)
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_brotli_compression_middleware():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big() -> str:
+        return BIG_CONTENT
+
+    response = TestClient(app).get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+
+
+@pytest.fixture
+def static_client(tmp_path: Path) -> TestClient:
+    (tmp_path / "style.css").write_text(BIG_CONTENT)
+    (tmp_path / "other.css").write_text(BIG_CONTENT)
+    assert tmp_path / "style.css.gz" in compress_file(tmp_path / "style.css")
+
+    app = FastAPI()
+    app.mount("/public/", PrecompressedStaticFiles(directory=tmp_path, max_age=60))
+    return TestClient(app)
+
+
+def test_precompressed_static_files(static_client: TestClient, tmp_path: Path):
+    response = static_client.get("/public/style.css", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert int(response.headers["content-length"]) == len(
+        (tmp_path / "style.css.gz").read_bytes()
+    )
+    assert response.text == BIG_CONTENT
+    assert (
+        gzip.decompress((tmp_path / "style.css.gz").read_bytes()) == BIG_CONTENT.encode()
+    )
+
+    # Each variant has its own ETag
+    identity = static_client.get(
+        "/public/style.css", headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != response.headers["etag"]
+
+    not_modified = static_client.get(
+        "/public/style.css",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+
+    # No variant written for this one
+    other = static_client.get("/public/other.css", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in other.headers
@@ -0,0 +1,135 @@
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core import http_cache
+from app.core.database import engine
+from app.core.http_cache import LocalCache
+from app.factories.badge import BadgeFactory
+from app.models.badge import Badge
+from app.models.db_parameters import DBParameters
+from app.utils.testing import patch_bcrypt_hashpw
+
+
+@pytest.fixture(autouse=True)
+def enabled_cache(monkeypatch: pytest.MonkeyPatch):
+    """The cache is disabled for other tests (cf. pyproject.toml)."""
+    monkeypatch.setattr(http_cache.settings, "HTTP_CACHE_ENABLED", True)
+    monkeypatch.setattr(http_cache, "redis", fakeredis.FakeRedis())
+    http_cache.local_cache.clear()
+
+
+@pytest.fixture()
+def badge() -> Badge:
+    with patch_bcrypt_hashpw():
+        return BadgeFactory()
+
+
+def test_etag_and_not_modified(client: TestClient, badge: Badge):
+    response = client.get(f"/badges/{badge.id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["id"] == badge.id
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(f"/badges/{badge.id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_cached_body(client: TestClient, badge: Badge):
+    expected = client.get("/badges").content
+
+    # Not seen by the cache, as it does not go through an ORM session
+    with engine.begin() as connection:
+        connection.execute(delete(Badge.__table__))
+    assert client.get("/badges").content == expected
+
+    # Served by Redis when not in the local cache (e.g. other worker)
+    http_cache.local_cache.clear()
+    assert client.get("/badges").content == expected
+
+
+def test_invalidation_on_save(client: TestClient, badge: Badge):
+    response = client.get(f"/badges/{badge.id}")
+    assert response.json()["isActive"] is True
+
+    client.patch(f"/badges/{badge.id}/activity")  # saved through CrudLogic
+    new_response = client.get(
+        f"/badges/{badge.id}", headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert new_response.status_code == status.HTTP_200_OK
+    assert new_response.json()["isActive"] is False
+    assert new_response.headers["etag"] != response.headers["etag"]
+
+
+def test_invalidation_on_bulk_statement(
+    client: TestClient, badge: Badge, session: Session
+):
+    assert client.get("/badges").json()["totalItems"] == 1
+    version_key = http_cache.version_key(Badge.__tablename__)
+    version = http_cache.redis.get(version_key)
+
+    session.execute(delete(Badge))
+    session.rollback()  # not committed: nothing to invalidate
+    assert http_cache.redis.get(version_key) == version
+
+    session.execute(delete(Badge))
+    session.commit()
+    assert client.get("/badges").json()["totalItems"] == 0
+
+
+def test_same_json_as_without_cache(
+    client: TestClient, badge: Badge, monkeypatch: pytest.MonkeyPatch
+):
+    cached = [client.get(url).content for url in ("/badges", f"/badges/{badge.id}")]
+    monkeypatch.setattr(http_cache.settings, "HTTP_CACHE_ENABLED", False)
+    assert cached == [
+        client.get(url).content for url in ("/badges", f"/badges/{badge.id}")
+    ]
+
+
+def test_errors_not_cached(client: TestClient):
+    response = client.get("/badges/does-not-exist")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "etag" not in response.headers
+    assert not http_cache.local_cache.entries
+
+
+def test_redis_unavailable(client: TestClient, badge: Badge):
+    with patch.object(http_cache.redis, "mget", side_effect=ConnectionError()):
+        response = client.get(f"/badges/{badge.id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert "etag" not in response.headers
+
+
+def test_local_cache_is_bounded():
+    cache = LocalCache(max_size=2)
+    cache.set("a", b"a", ttl=60)
+    cache.set("b", b"b", ttl=60)
+    assert cache.get("a") == b"a"  # "b" is now the least recently used
+    cache.set("c", b"c", ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a"
+    cache.set("d", b"d", ttl=-1)  # already expired
+    assert cache.get("d") is None
+
+
+def test_db_parameters(client: TestClient, session: Session):
+    response = client.get("/debug/db-parameters")
+    assert response.json()["APP_TAGLINE"] is None
+
+    db_parameters = DBParameters.load(session)
+    db_parameters.APP_TAGLINE = "New tagline"
+    db_parameters.save(session)
+    new_response = client.get(
+        "/debug/db-parameters", headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert new_response.json()["APP_TAGLINE"] == "New tagline"
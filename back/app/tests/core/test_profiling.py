@@ -0,0 +1,89 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import profiling
+from app.core.profiling import PROFILE_FILE_HEADER, ProfilingMiddleware, collapse
+from app.factories.user import UserFactory
+from app.schemas.token import AccessJWT
+from app.utils.testing import patch_bcrypt_hashpw
+
+
+@pytest.fixture(autouse=True)
+def profiling_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    monkeypatch.setattr(profiling.settings, "PROFILING_DIR", tmp_path)
+    return tmp_path
+
+
+def busy_loop(duration: float) -> None:
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+def test_collapse():
+    stack = collapse(sys._getframe())
+    assert stack is not None
+    assert stack.endswith(f"{__name__}:test_collapse")
+
+    # Idle threads are ignored
+    event = threading.Event()
+    thread = threading.Thread(target=event.wait)
+    thread.start()
+    time.sleep(0.01)
+    assert collapse(sys._current_frames()[thread.ident]) is None  # type: ignore
+    event.set()
+    thread.join()
+
+
+def test_sampled_request(profiling_dir: Path):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, sample_rate=1)
+
+    @app.get("/busy")
+    def busy() -> None:
+        busy_loop(0.1)
+
+    response = TestClient(app).get("/busy")
+    name = response.headers[PROFILE_FILE_HEADER]
+    assert name.endswith("-GET-busy-" + name.split("-")[-1])
+    lines = (profiling_dir / name).read_text().splitlines()
+    busy_samples = sum(int(line.split()[-1]) for line in lines if "busy_loop" in line)
+    assert busy_samples > 5
+
+
+def test_superuser_header(client: TestClient, session: Session, profiling_dir: Path):
+    with patch_bcrypt_hashpw():
+        user = UserFactory()
+    headers = {
+        "Authorization": f"Bearer {AccessJWT.create(user.id).key}",
+        "X-Profile": "1",
+    }
+
+    # Not a superuser
+    response = client.get("/badges", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert PROFILE_FILE_HEADER not in response.headers
+    assert client.get("/debug/profiles", headers=headers).status_code == 403
+
+    user.is_superuser = True
+    user.save(session)
+    response = client.get("/badges", headers=headers)
+    name = response.headers[PROFILE_FILE_HEADER]
+
+    profiles = client.get("/debug/profiles", headers=headers).json()
+    assert [profile["name"] for profile in profiles] == [name]
+    assert profiles[0]["size"] == (profiling_dir / name).stat().st_size
+
+    response = client.get(f"/debug/profiles/{name}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == (profiling_dir / name).read_text()
+
+    response = client.get("/debug/profiles/..%2F..%2Fpyproject.toml", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
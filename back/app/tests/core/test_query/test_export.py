@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.query_export import Exporter, csv_fieldnames, flatten
+from app.core.query_projection import project
+from app.factories.badge import BadgeFactory
+from app.models.badge import Badge
+from app.schemas.badge import BadgeOut
+from app.schemas.base import MySchema
+from app.schemas.user import BadgeOwner
+from app.utils.testing import patch_bcrypt_hashpw
+
+
+@pytest.fixture()
+def badges() -> list[Badge]:
+    with patch_bcrypt_hashpw():
+        return [BadgeFactory() for _ in range(7)]
+
+
+def test_flatten():
+    assert flatten({"id": 1, "owner": {"id": 2, "label": "A B"}}) == {
+        "id": 1,
+        "owner.id": 2,
+        "owner.label": "A B",
+    }
+
+
+class OptionalOwner(MySchema):
+    id: str
+    owner: BadgeOwner | None
+
+
+def test_csv_fieldnames():
+    assert csv_fieldnames(OptionalOwner) == [
+        "id",
+        "owner.id",
+        "owner.firstName",
+        "owner.lastName",
+        "owner.label",
+    ]
+
+
+def test_export_csv_rows_with_null_nested_object():
+    owner = BadgeOwner(id="u1", first_name="Ada", last_name="Lovelace")
+    items = [OptionalOwner(id="a", owner=None), OptionalOwner(id="b", owner=owner)]
+    content = "".join(Exporter(format="csv").iter_csv(iter([items]), OptionalOwner))
+    assert list(csv.DictReader(io.StringIO(content))) == [
+        {
+            "id": "a",
+            "owner.id": "",
+            "owner.firstName": "",
+            "owner.lastName": "",
+            "owner.label": "",
+        },
+        {
+            "id": "b",
+            "owner.id": "u1",
+            "owner.firstName": "Ada",
+            "owner.lastName": "Lovelace",
+            "owner.label": "Ada Lovelace",
+        },
+    ]
+
+
+def test_export_csv_header_without_rows(client: TestClient):
+    response = client.get("/badges/export", params={"format": "csv"})
+    assert response.text.splitlines() == [",".join(csv_fieldnames(BadgeOut))]
+
+
+def test_export_batches(
+    session: Session, badges: list[Badge], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(get_settings(), "EXPORT_BATCH_SIZE", 3)
+    options: list[dict[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:  # type: ignore
+        options.append(dict(context.execution_options))
+
+    event.listen(session.get_bind(), "before_cursor_execute", record)
+    try:
+        batches = list(
+            Exporter().iter_batches(project(Badge, BadgeOut), BadgeOut, session)
+        )
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", record)
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert options[0]["stream_results"] is True  # server-side cursor
+
+
+def test_export_ndjson(client: TestClient, badges: list[Badge]):
+    response = client.get("/badges/export")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="badges.ndjson"' in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    assert len(lines) == len(badges)
+    # Same items as the paginated endpoint
+    page = client.get("/badges", params={"pageSize": 50}).json()
+    assert sorted(lines) == sorted(
+        json.dumps(item, separators=(",", ":"), ensure_ascii=False)
+        for item in page["items"]
+    )
+
+
+def test_export_csv_with_filters(client: TestClient, badges: list[Badge]):
+    expected = [badge for badge in badges if badge.expired is False]
+    response = client.get(
+        "/badges/export", params={"format": "csv", "expired": False, "ordering": "-id"}
+    )
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["id"] for row in rows] == sorted((b.id for b in expected), reverse=True)
+    assert rows[0]["owner.label"]
+
+
+def test_export_users(client: TestClient, badges: list[Badge]):
+    response = client.get("/users/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["id"] for row in rows} == {badge.owner_id for badge in badges}
+
+
+def test_export_wrong_format(client: TestClient):
+    response = client.get("/badges/export", params={"format": "xml"})
+    assert response.status_code == 422
+
+
+def test_export_releases_connection(client: TestClient, badges: list[Badge]):
+    checked_out = engine.pool.checkedout()
+    response = client.get("/badges/export")
+    assert len(response.text.splitlines()) == len(badges)
+    assert engine.pool.checkedout() == checked_out
+
+
+@pytest.mark.asyncio
+async def test_aborted_export_releases_connection(
+    badges: list[Badge], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(get_settings(), "EXPORT_BATCH_SIZE", 3)
+    checked_out = engine.pool.checkedout()
+    response = Exporter().export(project(Badge, BadgeOut), BadgeOut, filename="badges")
+    body = response.body_iterator
+    await anext(body)  # type: ignore
+    assert engine.pool.checkedout() == checked_out + 1  # cursor still open
+
+    await body.aclose()  # type: ignore - what happens when the client disconnects
+    assert engine.pool.checkedout() == checked_out
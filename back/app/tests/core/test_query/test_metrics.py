@@ -0,0 +1,94 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, lazyload
+
+from app.core import query_metrics
+from app.core.database import engine
+from app.core.query_timing import START_TIME_KEY
+from app.core.query_metrics import QueryStats, log_stats, record_queries
+from app.factories.badge import BadgeFactory
+from app.models.badge import Badge
+from app.utils.testing import patch_bcrypt_hashpw
+
+
+@pytest.fixture()
+def badges() -> list[Badge]:
+    with patch_bcrypt_hashpw():
+        return [BadgeFactory() for _ in range(6)]
+
+
+def test_server_timing(
+    client: TestClient, badges: list[Badge], monkeypatch: pytest.MonkeyPatch
+):
+    assert "server-timing" not in client.get("/badges").headers  # test environment
+
+    monkeypatch.setattr(query_metrics.settings, "DATABASE_SERVER_TIMING", True)
+    response = client.get("/badges")
+    assert re.fullmatch(
+        r'db;dur=\d+\.\d;desc="2 queries"', response.headers["server-timing"]
+    )
+
+
+def test_log_query_stats(monkeypatch: pytest.MonkeyPatch):
+    stats = QueryStats()
+    stats.add("SELECT 1", {}, duration=0.002)
+    messages: list[str] = []
+    handler_id = logger.add(messages.append, level="DEBUG", format="{message}")
+    try:
+        log_stats(stats, "GET /badges")
+        assert messages == []
+
+        monkeypatch.setattr(query_metrics.settings, "DATABASE_LOG_QUERY_STATS", True)
+        log_stats(stats, "GET /badges")
+    finally:
+        logger.remove(handler_id)
+    assert messages == ["GET /badges: 1 queries in 2.0 ms\n"]
+
+
+def test_n_plus_one_detection(badges: list[Badge], session: Session):
+    session.expire_all()
+    with record_queries() as stats:
+        # (owners are usually loaded with a single "selectin" query)
+        for badge in session.scalars(select(Badge).options(lazyload(Badge.owner))):
+            assert badge.owner.id
+    assert stats.count == 1 + len(badges)
+
+    repeated = stats.repeated(threshold=5)
+    assert len(repeated) == 1
+    statement, count = next(iter(repeated.items()))
+    assert "FROM tb_user" in statement
+    assert count == len(badges)
+
+    messages: list[str] = []
+    handler_id = logger.add(messages.append, level="WARNING", format="{message}")
+    try:
+        log_stats(stats, "GET /badges")
+    finally:
+        logger.remove(handler_id)
+    assert len(messages) == 1
+    assert messages[0].startswith("Possible N+1 query on GET /badges, executed 6 times")
+
+
+def test_same_parameters_are_not_n_plus_one():
+    stats = QueryStats()
+    for _ in range(10):
+        stats.add("SELECT 1", {}, duration=0.001)
+    assert stats.count == 10
+    assert stats.repeated(threshold=5) == {}
+
+
+def test_failed_statements_are_forgotten():
+    with engine.connect() as connection:
+        with pytest.raises(DBAPIError):
+            connection.exec_driver_sql("SELECT 1 / 0")
+        assert START_TIME_KEY not in connection.info
+        connection.rollback()
+        with record_queries() as stats:
+            connection.exec_driver_sql("SELECT 1")
+        assert stats.count == 1
+        assert START_TIME_KEY not in connection.info
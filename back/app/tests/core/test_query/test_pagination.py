@@ -1,5 +1,7 @@
 # Test paginator
 import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -140,3 +142,17 @@ def test_paginator_with_multiple_objects(session: Session):
     assert p.total_pages == 2
     assert p.current_page_size == 12
     assert p.current_page == 2
+
+
+def test_paginate_response_is_same_json(session: Session):
+    """The fast path must render exactly what FastAPI renders from the Page model."""
+
+    for _ in range(3):
+        PaginationObj().save(session)
+    paginator = Paginator(page=1, page_size=2)
+
+    response = paginator.paginate_response(query, PaginationSch, session)
+    page = paginator.paginate(query, PaginationSch, session)
+    expected = JSONResponse(content=jsonable_encoder(page, by_alias=True))
+    assert response.body == expected.body
+    assert response.media_type == "application/json"
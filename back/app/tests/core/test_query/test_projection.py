@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.query_pagination import Paginator
+from app.core.query_projection import project, unflatten
+from app.factories.badge import BadgeFactory
+from app.models.badge import Badge
+from app.models.user import User
+from app.schemas.badge import BadgeOut
+from app.schemas.base import MySchema
+from app.utils.testing import patch_bcrypt_hashpw
+
+
+@pytest.fixture()
+def badges() -> list[Badge]:
+    with patch_bcrypt_hashpw():
+        return [BadgeFactory() for _ in range(3)]
+
+
+def test_project_nested_schema(session: Session, badges: list[Badge]):
+    query = project(Badge, BadgeOut).order_by(Badge.id)
+    rows = session.execute(query).mappings().all()
+
+    assert set(rows[0].keys()) == {
+        "id",
+        "created_at",
+        "modified_at",
+        "expire_at",
+        "expired",
+        "is_active",
+        "owner__id",
+        "owner__first_name",
+        "owner__last_name",
+    }
+    # Same output as when validating ORM objects
+    for row, badge in zip(rows, sorted(badges, key=lambda b: b.id), strict=True):
+        assert BadgeOut.model_validate(unflatten(row)) == BadgeOut.model_validate(badge)
+
+
+def test_project_single_query(session: Session, badges: list[Badge]):
+    statements: list[str] = []
+    session.expunge_all()
+
+    def count(*args: object) -> None:
+        statements.append(str(args[2]))
+
+    event.listen(session.get_bind(), "before_cursor_execute", count)
+    try:
+        page = Paginator(page=1, page_size=10).paginate(
+            project(Badge, BadgeOut), BadgeOut, session
+        )
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", count)
+
+    assert len(page.items) == 3
+    assert len(statements) == 2  # count + page, no extra query for owners
+    assert "tb_user" in statements[1]
+    assert not any(isinstance(obj, Badge) for obj in session.identity_map.values())
+
+
+def test_project_wrong_relationship():
+    class UserWithOneBadge(MySchema):
+        badges: BadgeOut  # but it is a one-to-many relationship
+
+    with pytest.raises(ValueError):
+        project(User, UserWithOneBadge)
+
+
+def test_unflatten():
+    row = {"id": "a", "owner__id": None, "owner__first_name": None}
+    assert unflatten(row) == {"id": "a", "owner": None}  # type: ignore
+    row = {"id": "a", "owner__id": "b", "owner__first_name": None}
+    assert unflatten(row) == {"id": "a", "owner": {"id": "b", "first_name": None}}  # type: ignore
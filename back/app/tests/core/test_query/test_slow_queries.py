@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core import slow_queries
+from app.core.slow_queries import is_explainable, normalize
+from app.factories.user import UserFactory
+from app.models.user import User
+from app.schemas.token import AccessJWT
+from app.utils.testing import patch_bcrypt_hashpw
+
+
+@pytest.fixture(autouse=True)
+def log_all_queries(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(slow_queries.settings, "SLOW_QUERY_THRESHOLD", timedelta(0))
+    monkeypatch.setattr(slow_queries.settings, "SLOW_QUERY_EXPLAIN_RATE", 1)
+    slow_queries.slow_queries.clear()
+
+
+def wait_for_explain():
+    slow_queries.explain_executor.submit(lambda: None).result()
+
+
+def test_normalize():
+    statement = """
+        SELECT tb_user.id
+        FROM tb_user
+        WHERE tb_user.id IN (%(id_1)s::VARCHAR, %(id_2)s::VARCHAR,  %(id_3)s::VARCHAR)
+        AND tb_user.first_name = %(first_name_1)s::VARCHAR
+    """
+    assert normalize(statement) == (
+        "SELECT tb_user.id FROM tb_user WHERE tb_user.id IN (...) "
+        "AND tb_user.first_name = %(first_name_1)s::VARCHAR"
+    )
+
+
+def test_is_explainable():
+    assert is_explainable("SELECT tb_user.id FROM tb_user")
+    assert not is_explainable("UPDATE tb_user SET first_name = 'John'")
+    assert not is_explainable("SELECT tb_user.id FROM tb_user FOR UPDATE")
+    assert not is_explainable(
+        "SELECT tb_user.id FROM tb_user FOR NO KEY UPDATE SKIP LOCKED"
+    )
+    assert not is_explainable("SELECT tb_user.id FROM tb_user FOR KEY SHARE")
+    assert not is_explainable("SELECT nextval('tb_user_id_seq')")
+    assert not is_explainable("SELECT pg_try_advisory_lock(%(key)s)")
+
+
+def test_slow_select_is_explained(session: Session):
+    session.scalars(select(User).where(User.first_name.ilike("%john%"))).all()
+    wait_for_explain()
+
+    slow_query = slow_queries.read_slow_queries()[0]
+    assert slow_query.statement.endswith(
+        "WHERE tb_user.first_name ILIKE %(first_name_1)s::VARCHAR"
+    )
+    assert "john" in slow_query.parameters
+    assert slow_query.plan is not None
+    assert "Seq Scan on tb_user" in slow_query.plan
+    assert "actual time" in slow_query.plan
+
+
+def test_other_statements_are_not_explained(session: Session):
+    session.execute(text("UPDATE tb_user SET first_name = 'John'"))
+    session.rollback()
+    wait_for_explain()
+
+    slow_query = slow_queries.read_slow_queries()[0]
+    assert slow_query.statement.startswith("UPDATE tb_user")
+    assert slow_query.plan is None
+
+
+def test_locking_select_is_not_explained(session: Session):
+    session.scalars(select(User).with_for_update()).all()
+    session.rollback()
+    wait_for_explain()
+
+    slow_query = slow_queries.read_slow_queries()[0]
+    assert slow_query.statement.endswith("FOR UPDATE")
+    assert slow_query.plan is None
+
+
+def test_explain_timeout(session: Session, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        slow_queries.settings, "SLOW_QUERY_EXPLAIN_TIMEOUT", timedelta(milliseconds=10)
+    )
+    session.execute(text("SELECT pg_sleep(0.1)"))
+    wait_for_explain()
+
+    slow_query = slow_queries.read_slow_queries()[0]
+    assert slow_query.statement == "SELECT pg_sleep(0.1)"
+    assert slow_query.plan is None  # canceled
+
+
+def test_ring_buffer(session: Session, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(slow_queries.settings, "SLOW_QUERY_EXPLAIN_RATE", 0)
+    for i in range(slow_queries.settings.SLOW_QUERY_LOG_SIZE + 10):
+        session.execute(text(f"SELECT {i}"))
+    assert len(slow_queries.slow_queries) == slow_queries.settings.SLOW_QUERY_LOG_SIZE
+    assert slow_queries.read_slow_queries()[0].statement == (
+        f"SELECT {slow_queries.settings.SLOW_QUERY_LOG_SIZE + 9}"
+    )
+
+
+def test_debug_endpoint(client: TestClient, session: Session):
+    with patch_bcrypt_hashpw():
+        user = UserFactory()
+    headers = {"Authorization": f"Bearer {AccessJWT.create(user.id).key}"}
+    response = client.get("/debug/slow-queries", headers=headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    user.is_superuser = True
+    user.save(session)
+    response = client.get("/debug/slow-queries", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["statement"].startswith("SELECT tb_user.")
+    assert {"parameters", "duration", "executedAt", "plan"} <= set(response.json()[0])
@@ -1,4 +1,5 @@
-from datetime import timedelta
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
 
 import pytest
 from celery import Celery  # type: ignore
@@ -6,6 +7,7 @@ from celery.schedules import crontab, schedule  # type: ignore
 from sqlalchemy.orm import Session
 
 from app.core.scheduling import MyDatabaseScheduler
+from app.models.beat_leader_lease import BeatLeaderLease
 from app.models.periodic_task import PeriodicTask
 from app.schemas.periodic_task import PeriodicTaskIn
 
@@ -61,3 +63,174 @@ def test_my_database_scheduler(celery_app: Celery, session: Session):
     assert entry2.kwargs == {"age": 13}
     assert entry2.schedule.minute == {0}
     assert entry2.schedule.hour == {12}
+
+
+def test_my_database_scheduler_refresh(celery_app: Celery, session: Session):
+    """
+    Test that database changes are applied to an existing schedule, without
+    rebuilding untouched entries.
+    """
+    task1 = PeriodicTask(
+        **PeriodicTaskIn(name="task1", task="t1", interval=timedelta(days=1)).model_dump()
+    ).save(session)
+    task2 = PeriodicTask(
+        **PeriodicTaskIn(name="task2", task="t2", interval=timedelta(days=2)).model_dump()
+    ).save(session)
+
+    scheduler = MyDatabaseScheduler(app=celery_app)
+    assert set(scheduler.schedule) == {"task1", "task2"}
+    untouched_entry = scheduler.schedule["task2"]
+
+    # Nothing changed: the schedule is left as is
+    scheduler.refresh_schedule(session)
+    assert scheduler.schedule["task2"] is untouched_entry
+
+    # Add, update and delete tasks
+    PeriodicTask(
+        **PeriodicTaskIn(
+            name="task3", task="t3", interval=timedelta(hours=1)
+        ).model_dump()
+    ).save(session)
+    task1.interval = timedelta(minutes=5)
+    task1.save(session)
+    scheduler.refresh_schedule(session)
+    assert set(scheduler.schedule) == {"task1", "task2", "task3"}
+    assert scheduler.schedule["task1"].schedule.run_every == timedelta(minutes=5)
+    assert scheduler.schedule["task2"] is untouched_entry
+
+    task2.delete(session)
+    scheduler.refresh_schedule(session)
+    assert set(scheduler.schedule) == {"task1", "task3"}
+
+    # Deactivated tasks are removed too
+    task1.deactivate(session)
+    scheduler.refresh_schedule(session)
+    assert set(scheduler.schedule) == {"task3"}
+
+
+def test_my_database_scheduler_sync_run_state(celery_app: Celery, session: Session):
+    """
+    Test that run states are written back by `sync`, and restored on restart.
+    """
+    task = PeriodicTask(
+        **PeriodicTaskIn(
+            name="task1", task="t1", interval=timedelta(hours=1)
+        ).model_dump()
+    ).save(session)
+    modified_at = task.modified_at
+
+    scheduler = MyDatabaseScheduler(app=celery_app)
+    for _ in range(3):
+        scheduler.reserve(scheduler.schedule["task1"])  # what Celery does when sending
+    scheduler.sync()
+
+    session.refresh(task)
+    assert task.total_run_count == 3
+    assert task.last_run_at is not None
+    assert task.modified_at == modified_at  # not seen as a change of the task itself
+
+    # After a restart, the run state is restored
+    restarted_scheduler = MyDatabaseScheduler(app=celery_app)
+    entry = restarted_scheduler.schedule["task1"]
+    assert entry.total_run_count == 3
+    assert entry.last_run_at == task.last_run_at.replace(tzinfo=UTC)
+
+
+def test_my_database_scheduler_leader_election(celery_app: Celery, session: Session):
+    """
+    Test that only one scheduler dispatches tasks, and that another one takes over
+    once the leader lease expires.
+    """
+    leader = MyDatabaseScheduler(app=celery_app)
+    standby = MyDatabaseScheduler(app=celery_app)
+    leader.holder, standby.holder = "leader", "standby"
+
+    with patch.object(
+        MyDatabaseScheduler, "_tick_schedule", return_value=1.0
+    ) as celery_tick:
+        leader.tick()
+        standby.tick()
+        assert leader.is_leader is True
+        assert standby.is_leader is False
+        celery_tick.assert_called_once()  # the standby did not dispatch anything
+
+        # The leader dies: its lease is not renewed anymore and expires
+        lease = BeatLeaderLease.load(session)
+        lease.expire_at = datetime.now(UTC).replace(tzinfo=None) - timedelta(hours=1)
+        lease.save(session)
+
+        standby._last_lease_renewal = 0  # don't wait for the next renewal
+        standby.tick()
+        assert standby.is_leader is True
+        assert celery_tick.call_count == 2
+
+        leader._last_lease_renewal = 0
+        leader.tick()
+        assert leader.is_leader is False
+
+
+def test_my_database_scheduler_close_releases_lease(celery_app: Celery, session: Session):
+    scheduler = MyDatabaseScheduler(app=celery_app)
+    with patch.object(MyDatabaseScheduler, "_tick_schedule", return_value=1.0):
+        scheduler.tick()
+    assert scheduler.is_leader is True
+
+    scheduler.close()
+    assert BeatLeaderLease.load(session).holder is None
+    assert BeatLeaderLease.acquire("other", timedelta(seconds=30), session) is True
+
+
+def test_my_database_scheduler_run_heap(celery_app: Celery, session: Session):
+    """
+    Test that only due entries are sent, and that outdated heap items are skipped.
+    """
+    PeriodicTask(
+        **PeriodicTaskIn(name="due", task="t1", interval=timedelta(hours=1)).model_dump()
+    ).save(session)
+    later = PeriodicTask(
+        **PeriodicTaskIn(name="later", task="t2", interval=timedelta(days=1)).model_dump()
+    ).save(session)
+    # The first run of an interval task is one interval after its creation
+    assert later.next_run_at is not None
+    assert later.next_run_at - datetime.now(UTC).replace(tzinfo=None) > timedelta(
+        hours=23
+    )
+
+    scheduler = MyDatabaseScheduler(app=celery_app)
+    scheduler.is_leader = True
+    # "due" was last sent long ago
+    scheduler.schedule["due"].last_run_at = datetime.now(UTC) - timedelta(hours=2)
+    scheduler._push("due", 0)
+    scheduler.apply_entry = MagicMock()
+    scheduler.producer = MagicMock()  # no broker
+
+    delay = scheduler._tick_schedule()
+    sent = [call.args[0].name for call in scheduler.apply_entry.call_args_list]
+    assert sent == ["due"]
+    assert scheduler.schedule["due"].total_run_count == 1
+    assert 0 < delay <= scheduler.max_interval
+    # One item per entry: outdated ones were dropped when reached
+    assert sorted(name for _, name, _ in scheduler._run_heap) == ["due", "later"]
+
+    # Nothing is due anymore
+    scheduler.apply_entry.reset_mock()
+    scheduler._tick_schedule()
+    scheduler.apply_entry.assert_not_called()
+
+
+def test_my_database_scheduler_sync_next_run_at(celery_app: Celery, session: Session):
+    task = PeriodicTask(
+        **PeriodicTaskIn(
+            name="task1", task="t1", interval=timedelta(hours=1)
+        ).model_dump()
+    ).save(session)
+
+    scheduler = MyDatabaseScheduler(app=celery_app)
+    scheduler.reserve(scheduler.schedule["task1"])
+    scheduler.sync()
+
+    session.refresh(task)
+    assert task.last_run_at is not None and task.next_run_at is not None
+    assert abs(task.next_run_at - task.last_run_at - timedelta(hours=1)) < timedelta(
+        seconds=5
+    )
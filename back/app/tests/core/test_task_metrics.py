@@ -0,0 +1,63 @@
+import time
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from celery import Celery  # type: ignore
+
+from app.core import task_metrics
+from app.core.task_metrics import TaskMetricsRecorder, add_sent_at_header, bucket_label
+
+
+@pytest.fixture
+def recorder() -> TaskMetricsRecorder:
+    recorder = TaskMetricsRecorder(redis=fakeredis.FakeRedis(decode_responses=True))
+    with patch.object(task_metrics, "recorder", recorder):
+        yield recorder
+
+
+def test_bucket_label():
+    assert bucket_label(0) == "0.005"
+    assert bucket_label(0.3) == "0.5"
+    assert bucket_label(3600) == "inf"
+
+
+def test_task_metrics_from_signals(recorder: TaskMetricsRecorder):
+    app = Celery("test_app")
+
+    @app.task(shared=False)
+    def ok() -> None:
+        pass
+
+    @app.task(shared=False)
+    def ko() -> None:
+        raise ValueError()
+
+    for _ in range(3):
+        ok.apply()
+    ko.apply()
+    # Workers receive the header set on publication
+    ok.apply(headers={"sent_at": time.time() - 0.2})
+    recorder.flush()
+
+    metrics = {m.name: m for m in recorder.read()}
+    assert metrics[ok.name].succeeded == 4
+    assert metrics[ok.name].failed == 0
+    assert sum(metrics[ok.name].runtime_buckets.values()) == 4
+    assert metrics[ok.name].queue_latency_count == 1
+    assert metrics[ok.name].queue_latency_buckets == {"0.25": 1}
+    assert metrics[ko.name].succeeded == 0
+    assert metrics[ko.name].failed == 1
+
+
+def test_sent_at_header():
+    headers = {}
+    add_sent_at_header(headers=headers)
+    assert time.time() - headers["sent_at"] < 1
+
+    # A task with an ETA is not late before its ETA
+    eta = datetime.now(UTC) + timedelta(hours=1)
+    headers = {"eta": eta.isoformat()}
+    add_sent_at_header(headers=headers)
+    assert headers["sent_at"] == eta.timestamp()
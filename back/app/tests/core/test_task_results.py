@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from celery import Celery, states  # type: ignore
+from sqlalchemy import func, select, update
+
+from app.core.config import get_settings
+from app.core.task_results import delete_expired_results
+
+settings = get_settings()
+
+
+def test_delete_expired_results():
+    app = Celery("test_app", backend=settings.celery_result_backend)
+    app.conf.result_expires = timedelta(hours=1)
+    backend = app.backend
+    table = backend.task_cls.__table__
+
+    for i in range(5):
+        backend.store_result(f"task-{i}", i, states.SUCCESS)
+
+    session = backend.ResultSession()
+    try:
+        # Make 3 of them older than result_expires
+        session.execute(
+            update(table)
+            .where(table.c.task_id.in_(["task-0", "task-1", "task-2"]))
+            .values(date_done=table.c.date_done - timedelta(days=1))
+        )
+        session.commit()
+
+        assert delete_expired_results(backend, batch_size=2) == 3
+        remaining = session.execute(
+            select(func.count()).where(table.c.task_id.like("task-%"))
+        ).scalar_one()
+        assert remaining == 2
+    finally:
+        session.execute(table.delete())
+        session.commit()
+        session.close()
+
+
+def test_celery_settings():
+    # Per-task settings (annotations) and expiry reach Celery's configuration
+    app = Celery("test_app")
+    app.config_from_object(
+        obj=settings.model_copy(
+            update={"celery_task_annotations": {"t": {"ignore_result": True}}}
+        ).model_dump(),
+        namespace="celery",
+    )
+    assert app.conf.result_expires == settings.celery_result_expires
+    assert app.conf.task_annotations == {"t": {"ignore_result": True}}
+
+    redis_settings = settings.model_copy(update={"TASK_RESULT_BACKEND": "redis"})
+    assert redis_settings.celery_result_backend == settings.REDIS_URI
@@ -0,0 +1,29 @@
+import pytest
+
+from app.confcelery import celery_app
+
+
+@pytest.mark.parametrize(
+    ("task_name", "queue", "priority"),
+    [
+        ("app.tasks.tasks.add", "interactive", None),
+        ("app.tasks.tasks.add_many", "bulk", None),
+        ("app.tasks.tasks.cleanup_task_results", "bulk", 9),
+        ("app.tasks.tasks.unknown", "default", None),
+    ],
+)
+def test_task_routes(task_name: str, queue: str, priority: int | None):
+    # Routing is resolved by the producer: no broker is needed
+    route = celery_app.amqp.router.route({}, task_name)
+    assert route["queue"].name == queue
+    assert route.get("priority") == priority
+
+
+def test_explicit_queue_wins():
+    route = celery_app.amqp.router.route({"queue": "bulk"}, "app.tasks.tasks.add")
+    assert route["queue"].name == "bulk"
+
+
+def test_default_priority():
+    assert celery_app.conf.task_default_priority == 5
+    assert celery_app.conf.broker_transport_options["priority_steps"] == list(range(10))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from sqlalchemy.orm import Session
+
+from app.factories.badge import BadgeFactory
+from app.models.badge import Badge
+from app.utils.timezone import now_utc
+
+
+class TestBadge:
+    def test_sweep_expired(self, session: Session):
+        now = now_utc()
+        expired = [
+            BadgeFactory.create(expire_at=now - timedelta(days=i)) for i in range(1, 6)
+        ]
+        valid = BadgeFactory.create(expire_at=now + timedelta(days=1))
+        inactive = BadgeFactory.create(expire_at=now - timedelta(days=1), is_active=False)
+
+        chunks: list[list[str]] = []
+        assert Badge.sweep_expired(session, chunk_size=2, on_expired=chunks.append) == 5
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        # Oldest expiries first
+        assert chunks[0] == [expired[4].id, expired[3].id]
+
+        for badge in expired:
+            session.refresh(badge)
+            assert badge.is_active is False
+        session.refresh(valid)
+        assert valid.is_active is True
+        assert inactive.id not in sum(chunks, [])
+        assert Badge.sweep_expired(session) == 0  # nothing left
+
+    def test_sweep_expired_includes_past_expiries_set_later(self, session: Session):
+        now = now_utc()
+        old = BadgeFactory.create(expire_at=now - timedelta(days=2))
+        assert Badge.sweep_expired(session) == 1
+
+        # Reactivated badges, and badges created already expired, are swept too
+        old.activate(session)
+        created = BadgeFactory.create(expire_at=now - timedelta(days=5))
+        chunks: list[list[str]] = []
+        assert Badge.sweep_expired(session, on_expired=chunks.append) == 2
+        assert chunks == [[created.id, old.id]]
+        assert Badge.sweep_expired(session) == 0
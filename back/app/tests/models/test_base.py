@@ -17,6 +17,7 @@ from app.models.base import (
     TimeStampModel,
 )
 from app.schemas.base import MySchema
+from app.utils.timezone import now_utc
 
 
 class BaseObj(Base, CrudLogic):
@@ -222,7 +223,7 @@ def test_time_stamp_model(session: Session):
     assert obj.modified_at is not None
     assert obj.created_at == obj.modified_at
     # A small delta between python date and server date ensure they have the same schedule
-    assert abs(datetime.now() - obj.created_at) < timedelta(seconds=1)
+    assert abs(now_utc() - obj.created_at) < timedelta(seconds=1)
 
 
 class ExpireObject(SecretIdModel, ExpireModel, MyModel): ...
@@ -254,6 +255,14 @@ def test_expire_model(session: Session):
         ]
     )
 
+    # Test index-friendly filter
+    stmt_3 = select(ExpireObject).where(ExpireObject.filter_expired(True))
+    assert session.execute(stmt_3).scalars().all() == [obj_expired]
+    stmt_4 = select(ExpireObject).where(ExpireObject.filter_expired(False))
+    assert Counter(session.execute(stmt_4).scalars().all()) == Counter(
+        [obj_expire_soon, obj_no_expiration]
+    )
+
 
 class DeactivateObject(SecretIdModel, DeactivateModel, MyModel): ...
 
@@ -1,4 +1,6 @@
-from datetime import timedelta
+import subprocess
+import sys
+from datetime import UTC, datetime, timedelta
 
 import pytest
 import sqlalchemy
@@ -59,3 +61,60 @@ class TestPeriodicTask:
             is_active=True,
         ).save(session)
         assert interval_task.schedule_type == ScheduleType.INTERVAL
+
+    def test_crontab_expression_is_validated(self):
+        with pytest.raises(ValueError):
+            PeriodicTask(name="add", task="proj.tasks.add", crontab_expression="0 12 * *")
+        with pytest.raises(ValueError):
+            PeriodicTask(
+                name="add", task="proj.tasks.add", crontab_expression="61 * * * *"
+            )
+
+    def test_crontab_expression_is_parsed(self, session: Session):
+        task = PeriodicTask(
+            name="add",
+            task="proj.tasks.add",
+            crontab_expression=" 0  12 * * 1-5",
+            args=[],
+            kwargs={},
+            is_active=True,
+        ).save(session)
+        assert task.crontab_expression == "0 12 * * 1-5"
+        assert task.crontab_fields == {
+            "minute": "0",
+            "hour": "12",
+            "day_of_month": "*",
+            "month_of_year": "*",
+            "day_of_week": "1-5",
+        }
+        assert task.celery_schedule.hour == {12}
+
+    def test_next_run_at(self, session: Session):
+        task = PeriodicTask(
+            name="add",
+            task="proj.tasks.add",
+            crontab_expression="*/5 * * * *",
+            args=[],
+            kwargs={},
+            is_active=True,
+        ).save(session)
+        now = datetime.now(UTC).replace(tzinfo=None)
+        assert task.next_run_at is not None
+        assert now < task.next_run_at <= now + timedelta(minutes=5)
+        assert task.next_run_at.minute % 5 == 0
+
+        # Updated on save, from the run state
+        task.last_run_at = now - timedelta(days=1)
+        task.save(session)
+        assert task.next_run_at <= datetime.now(UTC).replace(tzinfo=None)
+
+
+def test_models_do_not_import_celery():
+    """Celery is only loaded when a schedule is computed, not with the models."""
+    process = subprocess.run(
+        [sys.executable, "-c", "import sys, app.models; print('celery' in sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert process.stdout.strip() == "False"
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.factories.badge import BadgeFactory
 from app.models.badge import Badge
-from app.utils.testing import patch_bcrypt_hashpw
+from app.utils.testing import MaxQueries, patch_bcrypt_hashpw
 
 
 @pytest.fixture()
@@ -17,15 +17,25 @@ def badges_data() -> list[Badge]:
 route = "/badges"
 
 
-def test_read_badges(client: TestClient, badges_data: list[Badge]):
-    response = client.get(route)
+def test_read_badges(
+    client: TestClient, badges_data: list[Badge], max_queries: MaxQueries
+):
+    with max_queries(2):  # count + page, owners included
+        response = client.get(route)
     page_of_badges = response.json()
     assert len(page_of_badges["items"]) == 10
 
 
-def test_read_badge_ok(client: TestClient, badges_data: list[Badge], session: Session):
+def test_read_badge_ok(
+    client: TestClient,
+    badges_data: list[Badge],
+    session: Session,
+    max_queries: MaxQueries,
+):
     badge = badges_data[3]
-    response = client.get(route + f"/{badge.id}")
+    url = route + f"/{badge.id}"
+    with max_queries(2):  # badge + owner
+        response = client.get(url)
     assert response.json()["id"] == badge.id
     assert response.json()["owner"]["id"] == badge.owner_id
 
@@ -107,3 +117,16 @@ def test_destroy_badge_ok(client: TestClient, badges_data: list[Badge], session:
     response = client.delete(route + f"/{badge.id}")
     assert response.status_code == status.HTTP_200_OK
     assert old_badge_count == Badge.count(session) + 1
+
+
+@pytest.mark.parametrize("expired", [True, False])
+def test_read_badges_filter_expired(
+    client: TestClient, badges_data: list[Badge], expired: bool
+):
+    expected = [badge.id for badge in badges_data if badge.expired is expired]
+    response = client.get(
+        route, params={"expired": expired, "pageSize": 50, "ordering": "expired"}
+    )
+    items = response.json()["items"]
+    assert sorted(item["id"] for item in items) == sorted(expected)
+    assert all(item["expired"] is expired for item in items)
@@ -1,12 +1,16 @@
 from typing import Any
+from unittest.mock import AsyncMock
 
 from fastapi import WebSocket, status
 from fastapi.testclient import TestClient
 from pytest import MonkeyPatch
+from redis.exceptions import ConnectionError as RedisConnectionError
 
+from app.core.config import get_settings
 from app.main import app
 from app.routes import websockets as ws_module
 
+settings = get_settings()
 client = TestClient(app)
 
 
@@ -44,3 +48,38 @@ def test_websocket_accepts_known_room(monkeypatch: MonkeyPatch):
         except Exception:
             still_open = False
         assert still_open
+
+
+def test_read_room_presence(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(ws_module.presence, "occupancy", AsyncMock(return_value=12))
+    response = client.get("/ws/room/chat/presence")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"type": "presence", "room": "chat", "occupancy": 12}
+
+
+def test_read_room_presence_unknown_room():
+    response = client.get("/ws/room/unknown/presence")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_read_room_presence_redis_unavailable(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(
+        ws_module.presence, "occupancy", AsyncMock(side_effect=RedisConnectionError())
+    )
+    response = client.get("/ws/room/chat/presence")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert "general" in response.json()["errors"]
+
+
+def test_websocket_presence_request_redis_unavailable(monkeypatch: MonkeyPatch):
+    """Without Redis, the occupancy of the current worker is sent instead."""
+    monkeypatch.setattr(
+        ws_module.presence, "occupancy", AsyncMock(side_effect=RedisConnectionError())
+    )
+    with client.websocket_connect("/ws/room/chat") as websocket:
+        websocket.send_text(settings.REDIS_PRESENCE_REQUEST)
+        assert websocket.receive_json() == {
+            "type": "presence",
+            "room": "chat",
+            "occupancy": 1,
+        }
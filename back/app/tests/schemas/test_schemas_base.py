@@ -12,6 +12,7 @@ from app.schemas.base import (
     PhoneNumberSchemaIn,
     PhoneNumberSchemaOut,
     TimeStampSchemaOut,
+    format_phone_number,
 )
 
 
@@ -72,6 +73,14 @@ class TestPhoneNumberSchemaOut:
         obj_out = PhoneNumberSchemaOut(phone_number=PhoneNumber("+33-6-10-20-30-40"))
         assert obj_out.model_dump()["phone_number"] == "06 10 20 30 40"
 
+    def test_pretty_phone_number_cached(self):
+        format_phone_number.cache_clear()
+        for _ in range(3):
+            obj_out = PhoneNumberSchemaOut(phone_number=PhoneNumber("+33-6-10-20-30-41"))
+            assert obj_out.model_dump()["phone_number"] == "06 10 20 30 41"
+        assert format_phone_number.cache_info().misses == 1
+        assert format_phone_number.cache_info().hits == 2
+
 
 class TestTimeStampSchemaOut:
     def test_timestampable_tz_aware_datefield(self):
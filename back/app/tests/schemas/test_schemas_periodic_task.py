@@ -0,0 +1,15 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.periodic_task import PeriodicTaskIn
+
+
+class TestPeriodicTaskIn:
+    def test_normalize_crontab_expression(self):
+        task = PeriodicTaskIn(name="add", task="t", crontab_expression=" 0  12 * * *")
+        assert task.crontab_expression == "0 12 * * *"
+
+    @pytest.mark.parametrize("expression", ["0 12 * *", "0 25 * * *", "x * * * *"])
+    def test_invalid_crontab_expression(self, expression: str):
+        with pytest.raises(ValidationError):
+            PeriodicTaskIn(name="add", task="t", crontab_expression=expression)
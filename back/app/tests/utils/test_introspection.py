@@ -0,0 +1,58 @@
+from app.commands.benchmark_startup import (
+    StartupMeasure,
+    find_regressions,
+    measure_startup,
+)
+from app.commands.profile_imports import ImportTime, group_by_package, parse_importtime
+from app.utils.introspection import import_package_modules
+
+
+def test_import_package_modules():
+    names = [module.__name__ for module in import_package_modules("app.routes")]
+    assert "app.routes.debug" in names
+    assert "app.routes.badges" in names
+
+    names = [
+        module.__name__
+        for module in import_package_modules("app.routes", exclude=("app.routes.debug",))
+    ]
+    assert "app.routes.debug" not in names
+    assert "app.routes.badges" in names
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     json.decoder\n"
+        "import time:       300 |        420 |   json\n"
+        "import time:        80 |        500 | app.main\n"
+        "some other line\n"
+    )
+    imports = parse_importtime(output)
+    assert imports == [
+        ImportTime("json.decoder", 120, 120),
+        ImportTime("json", 300, 420),
+        ImportTime("app.main", 80, 500),
+    ]
+    assert group_by_package(imports) == {"json": 420, "app": 80}
+
+
+def test_startup_regressions():
+    baseline = StartupMeasure.median(
+        [
+            StartupMeasure(1000, 100, 100),
+            StartupMeasure(3000, 300, 100),
+            StartupMeasure(2000, 200, 100),
+        ]
+    )
+    assert baseline == StartupMeasure(2000, 200, 100)
+    current = StartupMeasure(import_ms=2100, first_request_ms=300, rss_mb=90)
+    assert find_regressions(current, baseline, tolerance=0.2) == ["first_request_ms"]
+    assert find_regressions(current, baseline, tolerance=0.5) == []
+
+
+def test_measure_startup():
+    measure = measure_startup("/openapi.json")
+    assert measure.import_ms > 0
+    assert measure.first_request_ms > 0
+    assert measure.rss_mb > 10
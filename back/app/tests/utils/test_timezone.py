@@ -1,9 +1,10 @@
-from datetime import datetime
+from datetime import UTC, datetime
 from typing import Any
 from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
-from app.utils.timezone import localtime, make_aware, now
+from app.core.config import get_settings
+from app.utils.timezone import localtime, make_aware, now, to_local
 
 ZONE_INFO_PARIS = ZoneInfo("Europe/Paris")
 ZONE_INFO_SYDNEY = ZoneInfo("Australia/Sydney")
@@ -39,3 +40,12 @@ def test_make_aware_ok(mock: Any):
     assert naive_dt.tzinfo is None
     aware_dt = make_aware(naive_dt)
     assert aware_dt.tzinfo == ZONE_INFO_PARIS
+
+
+def test_to_local_ok():
+    aware_dt = datetime(2024, 12, 25, 18, 00, tzinfo=ZONE_INFO_SYDNEY)
+    assert to_local(aware_dt) == aware_dt
+    assert to_local(aware_dt).tzinfo == get_settings().TIMEZONE
+    # naive datetimes are assumed to be in UTC
+    naive_dt = datetime(2024, 12, 25, 18, 00)
+    assert to_local(naive_dt) == naive_dt.replace(tzinfo=UTC)
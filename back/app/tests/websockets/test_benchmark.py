@@ -0,0 +1,17 @@
+import pytest
+
+from app.commands.benchmark_websockets import run_benchmark
+
+
+@pytest.mark.asyncio
+async def test_benchmark_delivers_all_messages():
+    """Smoke test of the fan-out benchmark, with an in-memory Redis."""
+
+    result = await run_benchmark(
+        clients=20, rooms=4, rate=200, duration=0.1, fake_redis=True
+    )
+    assert result.published == 20
+    assert result.expected_deliveries == 20 * 5  # each room has 5 clients
+    assert result.deliveries == result.expected_deliveries
+    assert 0 < result.percentile(50) <= result.percentile(99)
+    assert result.memory_per_connection > 0
@@ -0,0 +1,76 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import WebSocket
+
+from app.websockets.managers import ConnectionManager
+from app.websockets.presence import PresenceTracker
+
+
+def make_redis(execute_result: list | None = None) -> tuple[MagicMock, MagicMock]:
+    """Build a fake Redis client whose pipeline records queued commands."""
+    redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=execute_result or [])
+    redis.pipeline.return_value.__aenter__.return_value = pipe
+    return redis, pipe
+
+
+@pytest.mark.asyncio
+async def test_presence_flush_is_batched():
+    """
+    Many joins/leaves between two flushes should lead to a single pipeline execution,
+    with a single count written per room.
+    """
+    redis, pipe = make_redis()
+    manager = ConnectionManager()
+    tracker = PresenceTracker(redis=redis, manager=manager)
+
+    websockets = [AsyncMock(spec=WebSocket) for _ in range(50)]
+    for websocket in websockets:
+        manager.add("chat", websocket)
+    for websocket in websockets[:20]:
+        manager.remove("chat", websocket)
+
+    await tracker.flush()
+    pipe.execute.assert_awaited_once()
+    pipe.hset.assert_called_once_with(tracker.counts_key("chat"), tracker.worker_id, 30)
+    assert tracker.published_rooms == {"chat"}
+
+    # Nothing changed: no write at all
+    await tracker.flush()
+    pipe.execute.assert_awaited_once()
+
+    # Heartbeat: published rooms are refreshed even if nothing changed
+    await tracker.flush(refresh_all=True)
+    assert pipe.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_presence_flush_removes_empty_rooms():
+    redis, pipe = make_redis()
+    manager = ConnectionManager()
+    tracker = PresenceTracker(redis=redis, manager=manager)
+
+    websocket = AsyncMock(spec=WebSocket)
+    manager.add("chat", websocket)
+    await tracker.flush()
+    manager.remove("chat", websocket)
+    await tracker.flush()
+
+    pipe.hdel.assert_called_once_with(tracker.counts_key("chat"), tracker.worker_id)
+    pipe.zrem.assert_called_once_with(tracker.workers_key("chat"), tracker.worker_id)
+    assert tracker.published_rooms == set()
+
+
+@pytest.mark.asyncio
+async def test_presence_occupancy_ignores_dead_workers():
+    alive_workers = ["worker-1", "worker-2"]
+    counts = {"worker-1": "3", "worker-2": "4", "dead-worker": "10"}
+    redis, pipe = make_redis(execute_result=[alive_workers, counts])
+    tracker = PresenceTracker(redis=redis, manager=ConnectionManager())
+
+    assert await tracker.occupancy("chat") == 7
+    min_score = pipe.zrangebyscore.call_args.args[1]
+    assert min_score == pytest.approx(time.time(), abs=5)
@@ -1,9 +1,12 @@
 import asyncio
+from datetime import timedelta
 from unittest.mock import AsyncMock, patch
 
+import fakeredis
 import pytest
 
-from app.websockets.redis_subscriber import redis_subscriber
+from app.websockets import redis_subscriber as redis_subscriber_module
+from app.websockets.redis_subscriber import redis_subscriber, subscriber_stats
 
 
 @pytest.mark.asyncio
@@ -23,6 +26,7 @@ async def test_redis_subscriber_handles_invalid_and_valid_messages():
         # Setup settings
         settings.REDIS_CHANNEL_PREFIX = "room:"
         settings.REDIS_RETRY_DELAY.total_seconds.return_value = 0.01
+        settings.REDIS_SUBSCRIBER_PING_DELAY.total_seconds.return_value = 60
 
         # Mock pubsub.listen to yield messages
         class DummyPubSub:
@@ -47,3 +51,23 @@ async def test_redis_subscriber_handles_invalid_and_valid_messages():
                 await redis_subscriber()
             # Only the valid pmessage should trigger broadcast
             mock_broadcast.assert_awaited_once_with("test", '{"msg":1}')
+
+
+@pytest.mark.asyncio
+async def test_redis_subscriber_lag(monkeypatch: pytest.MonkeyPatch):
+    """The lag is measured with PINGs, answered in order with messages."""
+
+    monkeypatch.setattr(redis_subscriber_module, "redis", fakeredis.FakeAsyncRedis())
+    monkeypatch.setattr(
+        redis_subscriber_module.settings,
+        "REDIS_SUBSCRIBER_PING_DELAY",
+        timedelta(milliseconds=10),
+    )
+    monkeypatch.setattr(subscriber_stats, "lag", -1)
+
+    task = asyncio.create_task(redis_subscriber())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert 0 <= subscriber_stats.lag < 1
@@ -0,0 +1,24 @@
+from celery.schedules import ParseException, crontab  # type: ignore
+
+# Order of the fields in a crontab expression, named as Celery's crontab arguments
+CRONTAB_FIELDS = ("minute", "hour", "day_of_month", "month_of_year", "day_of_week")
+
+
+def parse_crontab_expression(expression: str) -> dict[str, str]:
+    """
+    Split a crontab expression (e.g. '0 12 * * *') into Celery's crontab arguments.
+    Raise ValueError if the expression has not 5 fields, or if a field is invalid.
+    """
+
+    parts = expression.split()
+    if len(parts) != len(CRONTAB_FIELDS):
+        raise ValueError(
+            f"A crontab expression must have {len(CRONTAB_FIELDS)} fields, "
+            f"got {len(parts)}: '{expression}'"
+        )
+    fields = dict(zip(CRONTAB_FIELDS, parts, strict=True))
+    try:
+        crontab(**fields)  # all fields are parsed when instantiating
+    except (ParseException, ValueError) as e:
+        raise ValueError(f"Invalid crontab expression '{expression}': {e}") from e
+    return fields
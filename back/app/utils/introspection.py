@@ -1,19 +1,25 @@
 import importlib
 import inspect
 import pkgutil
+from collections.abc import Collection
 from pathlib import Path
 from types import ModuleType
 
 
-def import_package_modules(package: str) -> list[ModuleType]:
-    """Import and return all modules from a specified package."""
+def import_package_modules(
+    package: str, exclude: Collection[str] = ()
+) -> list[ModuleType]:
+    """
+    Import and return all modules from a specified package.
+    Modules listed in `exclude` (full names) are not imported at all.
+    """
 
     package_module = importlib.import_module(package)  # Import the package
     package_dir = Path(str(package_module.__file__)).parent
 
     modules: list[ModuleType] = []
     for _, module_name, is_pkg in pkgutil.iter_modules([str(package_dir)], f"{package}."):
-        if not is_pkg:
+        if not is_pkg and module_name not in exclude:
             module = importlib.import_module(module_name)  # Import the module
             modules.append(module)
 
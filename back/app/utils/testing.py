@@ -1,13 +1,20 @@
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
 from typing import Any
 from unittest import mock
 
 from httpx import Response
 
+from app.core.query_metrics import QueryStats, record_queries
+
 # When testing validation, we want a fixture to return the http Response
 # + the error payload for easier testing
 # Using dict[Any, Any] instead of ErrorPayload removes all warning due to total=False
 FixtureResponse = tuple[Response, dict[str, Any]]
 
+# Type of the `max_queries` fixture
+MaxQueries = Callable[[int], AbstractContextManager[QueryStats]]
+
 
 # mocks
 
@@ -20,3 +27,18 @@ def patch_bcrypt_hashpw():
         return b"fake_hashed_password"
 
     return mock.patch("bcrypt.hashpw", side_effect=fake_password_hash)
+
+
+# assertions
+
+
+@contextmanager
+def assert_max_queries(max_count: int) -> Iterator[QueryStats]:
+    """Fail if more than `max_count` SQL statements are executed in the block."""
+
+    with record_queries() as stats:
+        yield stats
+    assert stats.count <= max_count, (
+        f"{stats.count} queries executed (max {max_count}):\n"
+        + "\n".join(stats.statements)
+    )
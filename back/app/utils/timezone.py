@@ -39,5 +39,19 @@ def make_aware(naive_dt: NaiveDatetime, tz: ZoneInfo | None = None) -> AwareDate
     if naive_dt.tzinfo is not None:
         raise ValueError(f"make_aware expects a naive datetime, got {naive_dt}")
 
-    utc_dt = naive_dt.replace(tzinfo=ZoneInfo("UTC"))
+    utc_dt = naive_dt.replace(tzinfo=UTC)
     return utc_dt.astimezone(tz or get_settings().TIMEZONE)
+
+
+LOCAL_TIMEZONE = get_settings().TIMEZONE
+
+
+def to_local(dt: datetime) -> AwareDatetime:
+    """
+    Convert a datetime.datetime to local time, typically when serializing a DB value.
+    Aware datetimes (from `timestamptz` columns) are converted once; naive ones are
+    assumed to be in UTC. Unlike `localtime`, the timezone setting is read only once.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.astimezone(LOCAL_TIMEZONE)
@@ -4,9 +4,12 @@ from typing import Any
 
 from fastapi import WebSocket, WebSocketDisconnect
 from loguru import logger
+from redis.exceptions import RedisError
 
 from app.core.config import get_settings
+from app.websockets.presence import presence
 from app.websockets.redis_subscriber import manager
+from app.websockets.schemas.presence import WSPresenceMessage
 
 settings = get_settings()
 
@@ -18,7 +21,7 @@ async def handle_websocket_connection(
 ):
     """
     Accepts a WebSocket, assigns it to a room, and listens for messages.
-    Supports local heartbeat replies. Dispatches messages to the on_message handler.
+    Supports local heartbeat and presence replies. Dispatches messages to the on_message handler.
     """
 
     await websocket.accept()
@@ -38,6 +41,18 @@ async def handle_websocket_connection(
                 )
                 continue
 
+            # Handle presence request case (not JSON either): reply with room occupancy
+            if raw == settings.REDIS_PRESENCE_REQUEST:
+                try:
+                    occupancy = await presence.occupancy(room)
+                except RedisError as e:
+                    # degraded answer: the clients of this worker only
+                    logger.warning(f"Unable to read presence of room '{room}': {e}")
+                    occupancy = manager.count(room)
+                presence_msg = WSPresenceMessage(room=room, occupancy=occupancy)
+                await websocket.send_text(presence_msg.model_dump_json())
+                continue
+
             # Now we're sure message should be in JSON
             try:
                 data = json.loads(raw)
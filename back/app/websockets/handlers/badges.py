@@ -0,0 +1,13 @@
+"""
+The badges room only broadcasts server events (e.g. WSBadgesExpiredMessage, published
+by the expired badges sweep). Messages sent by clients are ignored.
+"""
+
+from typing import Any
+
+from fastapi import WebSocket
+from loguru import logger
+
+
+async def handle_badges_message(data: dict[str, Any], _: WebSocket) -> None:
+    logger.warning(f"Ignoring client message in read-only room 'badges': {data}")
@@ -11,18 +11,30 @@ from loguru import logger
 class ConnectionManager:
     def __init__(self) -> None:
         self.rooms: dict[str, set[WebSocket]] = defaultdict(set)
+        # Rooms whose local occupancy changed since the last presence flush
+        self.dirty_rooms: set[str] = set()
 
     def add(self, room: str, websocket: WebSocket) -> None:
         self.rooms[room].add(websocket)
+        self.dirty_rooms.add(room)
 
     def remove(self, room: str, websocket: WebSocket) -> None:
         self.rooms[room].discard(websocket)  # doesn't raise if missing
         if not self.rooms[room]:
             del self.rooms[room]
+        self.dirty_rooms.add(room)
 
     def get_room(self, room: str) -> set[WebSocket]:
         return self.rooms.get(room, set()).copy()
 
+    def count(self, room: str) -> int:
+        """Number of sockets connected to the given room on this worker only."""
+        return len(self.rooms.get(room, ()))
+
+    def pop_dirty_rooms(self) -> set[str]:
+        dirty_rooms, self.dirty_rooms = self.dirty_rooms, set()
+        return dirty_rooms
+
     async def broadcast(self, room: str, message: str) -> None:
         for client in self.get_room(room):
             try:
@@ -0,0 +1,131 @@
+# pyright: reportUnknownMemberType=false
+"""
+Keeps a cluster-wide view of how many clients are connected to each room.
+
+The ConnectionManager only knows the sockets of the current worker, so each worker
+periodically pushes its local counts to Redis:
+- `presence:{room}` is a hash mapping worker ids to their local count
+- `presence:{room}:workers` is a sorted set of worker ids, scored by their expiry time
+
+Writes are batched: joins and leaves only mark a room as dirty, and all dirty rooms are
+written in a single pipeline every REDIS_PRESENCE_FLUSH_DELAY. Entries are refreshed on
+a heartbeat basis, so the counts of a dead worker vanish after REDIS_PRESENCE_TTL.
+"""
+
+import asyncio
+import os
+import socket
+import time
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.websockets.managers import ConnectionManager
+from app.websockets.redis_subscriber import manager, redis
+
+settings = get_settings()
+
+
+class PresenceTracker:
+    def __init__(self, redis: Redis, manager: ConnectionManager) -> None:
+        self.redis = redis
+        self.manager = manager
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # Rooms for which this worker currently has an entry in Redis
+        self.published_rooms: set[str] = set()
+
+    @staticmethod
+    def counts_key(room: str) -> str:
+        return f"{settings.REDIS_PRESENCE_PREFIX}{room}"
+
+    @staticmethod
+    def workers_key(room: str) -> str:
+        return f"{settings.REDIS_PRESENCE_PREFIX}{room}:workers"
+
+    async def flush(self, refresh_all: bool = False) -> None:
+        """
+        Write the local counts of rooms that changed since the last flush.
+        With `refresh_all`, entries of all published rooms are refreshed too (heartbeat).
+        """
+        rooms = self.manager.pop_dirty_rooms()
+        if refresh_all:
+            rooms |= self.published_rooms
+        if not rooms:
+            return
+
+        ttl = settings.REDIS_PRESENCE_TTL
+        now = time.time()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for room in rooms:
+                    counts_key = self.counts_key(room)
+                    workers_key = self.workers_key(room)
+                    count = self.manager.count(room)
+                    if count:
+                        pipe.hset(counts_key, self.worker_id, count)
+                        pipe.zadd(
+                            workers_key, {self.worker_id: now + ttl.total_seconds()}
+                        )
+                        pipe.expire(counts_key, ttl)
+                        pipe.expire(workers_key, ttl)
+                    else:
+                        pipe.hdel(counts_key, self.worker_id)
+                        pipe.zrem(workers_key, self.worker_id)
+                    # forget workers that stopped sending heartbeats
+                    pipe.zremrangebyscore(workers_key, "-inf", now)
+                await pipe.execute()
+        except RedisError:
+            self.manager.dirty_rooms |= rooms  # retry on next flush
+            raise
+
+        for room in rooms:
+            if self.manager.count(room):
+                self.published_rooms.add(room)
+            else:
+                self.published_rooms.discard(room)
+
+    async def clear(self) -> None:
+        """Remove all entries of this worker (e.g. on shutdown)."""
+        if not self.published_rooms:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for room in self.published_rooms:
+                    pipe.hdel(self.counts_key(room), self.worker_id)
+                    pipe.zrem(self.workers_key(room), self.worker_id)
+                await pipe.execute()
+        except RedisError as e:
+            # not critical: entries will expire by themselves
+            logger.warning(f"Unable to clear presence entries: {e}")
+        self.published_rooms.clear()
+
+    async def occupancy(self, room: str) -> int:
+        """Number of clients connected to the given room, across all workers."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrangebyscore(self.workers_key(room), time.time(), "+inf")
+            pipe.hgetall(self.counts_key(room))
+            alive_workers, counts = await pipe.execute()
+
+        alive_workers = set(alive_workers)
+        return sum(
+            int(count) for worker, count in counts.items() if worker in alive_workers
+        )
+
+
+presence = PresenceTracker(redis=redis, manager=manager)
+
+
+async def presence_flusher() -> None:
+    flush_delay = settings.REDIS_PRESENCE_FLUSH_DELAY
+    # Refresh all entries ~3 times per TTL, so that a single missed flush is harmless
+    heartbeat_every = max(int(settings.REDIS_PRESENCE_TTL / flush_delay) // 3, 1)
+    tick = 0
+    while True:
+        await asyncio.sleep(flush_delay.total_seconds())
+        tick += 1
+        try:
+            await presence.flush(refresh_all=tick % heartbeat_every == 0)
+        except RedisError as e:
+            logger.error(f"Presence flush error: {e}. Retrying on next flush...")
@@ -6,10 +6,13 @@ Automatically reconnects on Redis errors.
 """
 
 import asyncio
+import time
+from dataclasses import dataclass
 
 import pydantic
 from loguru import logger
 from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
 from redis.exceptions import ConnectionError, RedisError, TimeoutError
 
 from app.core.config import get_settings
@@ -19,17 +22,42 @@ from app.websockets.schemas.redis import RedisPubSubMessage
 settings = get_settings()
 
 
+@dataclass
+class SubscriberStats:
+    """Figures of this worker's subscriber (cf. app/core/api_metrics.py)."""
+
+    reconnects: int = 0
+    lag: float = 0  # in seconds, time for a PING to get through pending messages
+
+
 redis = Redis.from_url(url=settings.REDIS_URI, decode_responses=True)
 manager = ConnectionManager()
+subscriber_stats = SubscriberStats()
+
+
+async def ping_periodically(pubsub: PubSub) -> None:
+    """The PONG carries the sending time, and is handled in order with messages."""
+    while True:
+        await asyncio.sleep(settings.REDIS_SUBSCRIBER_PING_DELAY.total_seconds())
+        try:
+            await pubsub.ping(message=str(time.time()))
+        except RedisError:
+            return  # the subscriber gets the error too, and reconnects
 
 
 async def redis_subscriber() -> None:
     while True:
+        pinger: asyncio.Task[None] | None = None
         try:
             pubsub = redis.pubsub()
             await pubsub.psubscribe(f"{settings.REDIS_CHANNEL_PREFIX}*")
+            pinger = asyncio.create_task(ping_periodically(pubsub))
 
             async for message in pubsub.listen():  # type: ignore
+                if message.get("type") == "pong":
+                    subscriber_stats.lag = time.time() - float(message["data"])
+                    continue
+
                 try:
                     parsed = RedisPubSubMessage(**message)  # type: ignore
                 except pydantic.ValidationError as e:
@@ -48,8 +76,12 @@ async def redis_subscriber() -> None:
                 await manager.broadcast(room, parsed.data)
 
         except (ConnectionError, TimeoutError, RedisError) as e:
+            subscriber_stats.reconnects += 1
             retry_delay_in_sec = settings.REDIS_RETRY_DELAY.total_seconds()
             logger.error(
                 f"Redis subscriber error: {e}. Retrying in {retry_delay_in_sec} seconds..."
             )
             await asyncio.sleep(retry_delay_in_sec)
+        finally:
+            if pinger is not None:
+                pinger.cancel()
@@ -0,0 +1,10 @@
+from typing import Literal
+
+from app.schemas.base import MySchema
+from app.utils.strings import SecretId
+
+
+class WSBadgesExpiredMessage(MySchema):
+    room: Literal["badges"] = "badges"
+    type: Literal["expired"] = "expired"
+    badge_ids: list[SecretId]
@@ -0,0 +1,11 @@
+from typing import Literal
+
+from pydantic import Field
+
+from app.schemas.base import MySchema
+
+
+class WSPresenceMessage(MySchema):
+    type: Literal["presence"] = "presence"
+    room: str
+    occupancy: int = Field(ge=0, description="Number of connected clients (all workers)")
@@ -0,0 +1,33 @@
+"""periodic task run state
+
+Revision ID: 30e8672a8fc4
+Revises: 36d891fb1a72
+Create Date: 2026-10-19 12:50:03.114208+02:00
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "30e8672a8fc4"
+down_revision: str | None = "36d891fb1a72"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_periodic_task", sa.Column("last_run_at", sa.DateTime(), nullable=True)
+    )
+    op.add_column(
+        "tb_periodic_task",
+        sa.Column("total_run_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tb_periodic_task", "total_run_count")
+    op.drop_column("tb_periodic_task", "last_run_at")
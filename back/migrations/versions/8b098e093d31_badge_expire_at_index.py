@@ -0,0 +1,36 @@
+"""badge expire_at index
+
+Revision ID: 8b098e093d31
+Revises: e1d0d2eb6355
+Create Date: 2026-10-19 17:31:47.903214+02:00
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b098e093d31"
+down_revision: str | None = "e1d0d2eb6355"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Built concurrently, so that writes to tb_badge are not blocked meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_badge_expire_at",
+            "tb_badge",
+            ["expire_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_badge_expire_at", table_name="tb_badge", postgresql_concurrently=True
+        )
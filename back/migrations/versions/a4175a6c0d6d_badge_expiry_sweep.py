@@ -0,0 +1,41 @@
+"""badge expiry sweep
+
+Revision ID: a4175a6c0d6d
+Revises: e66bf1bdf257
+Create Date: 2026-10-19 15:48:09.271904+02:00
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4175a6c0d6d"
+down_revision: str | None = "e66bf1bdf257"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Built concurrently, so that writes to tb_badge are not blocked meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_badge_expire_at_id_active",
+            "tb_badge",
+            ["expire_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_badge_expire_at_id_active",
+            table_name="tb_badge",
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
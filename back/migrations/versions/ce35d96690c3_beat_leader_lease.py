@@ -0,0 +1,32 @@
+"""beat leader lease
+
+Revision ID: ce35d96690c3
+Revises: 30e8672a8fc4
+Create Date: 2026-10-19 13:02:41.503117+02:00
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "ce35d96690c3"
+down_revision: str | None = "30e8672a8fc4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tb_beat_leader_lease",
+        sa.Column("holder", sa.String(), nullable=True),
+        sa.Column("expire_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tb_beat_leader_lease")
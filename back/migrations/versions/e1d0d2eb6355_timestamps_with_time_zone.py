@@ -0,0 +1,52 @@
+"""timestamps with time zone
+
+Revision ID: e1d0d2eb6355
+Revises: a4175a6c0d6d
+Create Date: 2026-10-19 17:05:22.418316+02:00
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1d0d2eb6355"
+down_revision: str | None = "a4175a6c0d6d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (table, column, nullable)
+COLUMNS = (
+    ("tb_badge", "created_at", False),
+    ("tb_badge", "modified_at", False),
+    ("tb_badge", "expire_at", True),
+    ("tb_periodic_task", "created_at", False),
+    ("tb_periodic_task", "modified_at", False),
+)
+
+
+def upgrade() -> None:
+    # Naive values were stored in UTC
+    for table, column, nullable in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(),
+            type_=sa.DateTime(timezone=True),
+            existing_nullable=nullable,
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    for table, column, nullable in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(timezone=True),
+            type_=sa.DateTime(),
+            existing_nullable=nullable,
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
@@ -0,0 +1,58 @@
+"""periodic task parsed schedule
+
+Revision ID: e66bf1bdf257
+Revises: ce35d96690c3
+Create Date: 2026-10-19 15:12:41.530217+02:00
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from app.utils.crontab import parse_crontab_expression
+
+# revision identifiers, used by Alembic.
+revision: str = "e66bf1bdf257"
+down_revision: str | None = "ce35d96690c3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_periodic_task",
+        sa.Column(
+            "crontab_fields", postgresql.JSON(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.add_column(
+        "tb_periodic_task", sa.Column("next_run_at", sa.DateTime(), nullable=True)
+    )
+
+    # Parse existing expressions (next_run_at is computed by beat when missing)
+    table = sa.table(
+        "tb_periodic_task",
+        sa.column("id", sa.Integer()),
+        sa.column("crontab_expression", sa.String()),
+        sa.column("crontab_fields", postgresql.JSON()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(table.c.id, table.c.crontab_expression).where(
+            table.c.crontab_expression.is_not(None)
+        )
+    )
+    for row_id, expression in rows.all():
+        connection.execute(
+            table.update()
+            .where(table.c.id == row_id)
+            .values(crontab_fields=parse_crontab_expression(expression))
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("tb_periodic_task", "next_run_at")
+    op.drop_column("tb_periodic_task", "crontab_fields")